@@ -4,18 +4,33 @@ Dhamma Channel Automation - Orchestrator Pipeline
 """
 
 import argparse
+import copy
+import functools
 import json
 import os
 import re
+import stat
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
 
 import yaml
 
+try:  # LibYAML bindings are much faster when available
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - fallback path
+    from yaml import SafeLoader as _YamlLoader
+
+try:  # orjson parse JSON จาก bytes ได้เร็วกว่า (ถ้าติดตั้งไว้) ใช้เฉพาะฝั่งอ่าน
+    import orjson
+except ImportError:  # pragma: no cover - fallback path
+    orjson = None
+
 ROOT = Path(__file__).parent
 SRC_ROOT = ROOT / "src"
 if str(SRC_ROOT) not in sys.path:
@@ -39,14 +54,44 @@ def write_text(path: Path, text: str):
 
 
 def write_json(path: Path, obj):
-    """เขียนไฟล์ JSON"""
+    """เขียนไฟล์ JSON แบบ atomic (ไฟล์ชั่วคราว + os.replace)"""
     ensure_dir(path.parent)
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    # ใช้ json มาตรฐานเสมอ เพื่อให้ไฟล์ที่เขียนไม่ขึ้นกับว่าติดตั้ง orjson หรือไม่
+    # (orjson เขียน NaN เป็น null, 1e16 ต่างรูปแบบ และ serialize datetime โดยไม่ error)
+    data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    # เขียนลงไฟล์ชั่วคราวแล้ว os.replace เหมือน FileQueue._write_job
+    # ชื่อไฟล์ชั่วคราวแยกตาม process และ thread เพราะ step อาจรันพร้อมกันหลาย thread
+    temp_path = path.with_suffix(
+        f"{path.suffix}.tmp.{os.getpid()}.{threading.get_ident()}"
+    )
+    try:
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    except OSError:
+        # ลบไฟล์ชั่วคราวถ้ามีปัญหาในการเขียนไฟล์ปลายทาง
+        try:
+            if temp_path.exists():
+                temp_path.unlink()
+        except OSError:
+            # ถ้าลบไม่สำเร็จให้ข้ามไปเพื่อไม่กลบข้อผิดพลาดหลัก
+            pass
+        raise
+
+
+def _loads_json(data: bytes | str):
+    """parse JSON จาก bytes/str (ใช้ orjson ถ้ามี)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson เข้มงวดกว่า (เช่น NaN, int เกิน 64 บิต) ให้ json มาตรฐานตัดสิน
+            pass
+    return json.loads(data)
 
 
 def read_json(path: Path):
-    """อ่านไฟล์ JSON"""
-    return json.loads(path.read_text(encoding="utf-8"))
+    """อ่านไฟล์ JSON (อ่านเป็น bytes แล้ว parse โดยไม่ decode เป็น str ก่อน)"""
+    return _loads_json(path.read_bytes())
 
 
 def log(msg: str, level="INFO"):
@@ -2306,6 +2351,38 @@ def agent_video_render(step, run_dir: Path):
     return summary_rel
 
 
+def _probe_media_info(path: str) -> bytes:
+    """
+    เรียก ffprobe ครั้งเดียวเพื่อดึงทั้ง duration และ codec_type ของทุก stream
+    (ไม่ cache: mp4 แต่ละไฟล์ถูกตรวจครั้งเดียวต่อ run และไฟล์ที่ render ใหม่
+    อาจมี mtime/size เดิมได้ จึงต้อง probe ไฟล์จริงทุกครั้ง)
+
+    Raises:
+        OSError: ถ้าเรียก ffprobe ไม่ได้
+        subprocess.CalledProcessError: ถ้า ffprobe คืน exit code ไม่เป็น 0
+    """
+    # -threads 1: การอ่าน metadata ไม่ได้ประโยชน์จากหลาย thread
+    # อ่าน stdout เป็น bytes เพื่อให้ parse JSON ได้โดยไม่ต้อง decode ก่อน
+    ffprobe_cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-threads",
+        "1",
+        "-show_entries",
+        "format=duration:stream=codec_type",
+        "-of",
+        "json",
+        path,
+    ]
+    completed = subprocess.run(ffprobe_cmd, check=False, capture_output=True)
+    if completed.returncode != 0:
+        raise subprocess.CalledProcessError(
+            completed.returncode, ffprobe_cmd, completed.stdout, completed.stderr
+        )
+    return completed.stdout
+
+
 def agent_quality_gate(step, run_dir: Path):
     """Quality Gate - ตรวจสอบคุณภาพวิดีโอที่เรนเดอร์แล้วแบบ deterministic."""
     run_id = run_dir.name
@@ -2383,8 +2460,14 @@ def agent_quality_gate(step, run_dir: Path):
             }
         )
 
+    # stat ครั้งเดียวแล้วใช้ผลซ้ำทั้งการตรวจว่ามีไฟล์และขนาดไฟล์
+    try:
+        mp4_stat: os.stat_result | None = output_mp4_abs.stat()
+    except OSError:
+        mp4_stat = None
+
     def _check_mp4_existence() -> None:
-        if not output_mp4_abs.is_file():
+        if mp4_stat is None or not stat.S_ISREG(mp4_stat.st_mode):
             _add_reason(
                 CODE_MP4_MISSING,
                 f"MP4 file not found: {output_mp4_rel}",
@@ -2395,7 +2478,8 @@ def agent_quality_gate(step, run_dir: Path):
         checks["mp4_exists"] = True
 
     def _check_mp4_size() -> None:
-        mp4_size = output_mp4_abs.stat().st_size
+        assert mp4_stat is not None
+        mp4_size = mp4_stat.st_size
         checks["mp4_size_bytes"] = mp4_size
         if mp4_size == 0:
             _add_reason(
@@ -2403,37 +2487,24 @@ def agent_quality_gate(step, run_dir: Path):
             )
 
     def _run_ffprobe() -> dict | None:
-        ffprobe_cmd = [
-            "ffprobe",
-            "-v",
-            "error",
-            "-show_entries",
-            "format=duration:stream=codec_type",
-            "-of",
-            "json",
-            str(output_mp4_abs),
-        ]
         try:
-            completed = subprocess.run(
-                ffprobe_cmd, check=False, capture_output=True, text=True
-            )
+            stdout = _probe_media_info(str(output_mp4_abs))
         except OSError:
             _add_reason(CODE_FFPROBE_FAILED, "ffprobe execution failed", SEVERITY_ERROR)
             checks["ffprobe_ok"] = False
             return None
-
-        if completed.returncode != 0:
+        except subprocess.CalledProcessError as exc:
             _add_reason(
                 CODE_FFPROBE_FAILED,
-                f"ffprobe returned non-zero exit code: {completed.returncode}",
+                f"ffprobe returned non-zero exit code: {exc.returncode}",
                 SEVERITY_ERROR,
             )
             checks["ffprobe_ok"] = False
             return None
 
         try:
-            data = json.loads(completed.stdout or "{}")
-        except json.JSONDecodeError:
+            data = _loads_json(stdout or b"{}")
+        except ValueError:
             _add_reason(
                 CODE_FFPROBE_FAILED, "ffprobe output was not valid JSON", SEVERITY_ERROR
             )
@@ -2479,9 +2550,8 @@ def agent_quality_gate(step, run_dir: Path):
     if checks["mp4_exists"]:
         _check_mp4_size()
 
-    if checks["mp4_exists"] and not any(
-        r.get("code") == CODE_MP4_EMPTY for r in reasons
-    ):
+    # ไฟล์ที่ไม่มีอยู่หรือว่างเปล่าไม่ต้องเรียก ffprobe เลย
+    if checks["mp4_exists"] and checks["mp4_size_bytes"]:
         ffprobe_data = _run_ffprobe()
         if checks["ffprobe_ok"]:
             assert ffprobe_data is not None
@@ -3607,28 +3677,123 @@ AGENTS = {
 # ========== PIPELINE RUNNER ==========
 
 
+def _step_dependencies(steps: list[dict]) -> dict[str, set[str]]:
+    """
+    สร้างกราฟ dependency ของ step จาก depends_on
+
+    step ที่ไม่ระบุ depends_on จะขึ้นกับ step ก่อนหน้า (ลำดับเดิมใน YAML)
+    ส่วน depends_on: [] หมายถึงเริ่มได้ทันที
+    """
+    step_ids = [step["id"] for step in steps]
+    known = set(step_ids)
+    if len(known) != len(step_ids):
+        # กราฟใช้ id เป็น key: id ซ้ำจะถูกรวมเป็น step เดียวและอีก step ถูกข้ามเงียบ ๆ
+        duplicates = sorted({sid for sid in step_ids if step_ids.count(sid) > 1})
+        raise RuntimeError(f"Duplicate step id(s): {duplicates}")
+    deps: dict[str, set[str]] = {}
+    previous: str | None = None
+    for step in steps:
+        step_id = step["id"]
+        declared = step.get("depends_on")
+        if declared is None:
+            required = {previous} if previous else set()
+        elif isinstance(declared, str):
+            required = {declared}
+        else:
+            required = set(declared)
+        unknown = required - known
+        if unknown:
+            raise RuntimeError(
+                f"Step {step_id} depends on unknown step(s): {sorted(unknown)}"
+            )
+        deps[step_id] = required
+        previous = step_id
+    return deps
+
+
+def _run_steps_concurrently(steps: list[dict], run_step) -> None:
+    """
+    รัน step ตาม dependency graph ด้วย ThreadPoolExecutor
+    step ที่ dependency ครบแล้วจะถูกส่งเข้า pool ทันที (งานส่วนใหญ่เป็น I/O/subprocess)
+    """
+    deps = _step_dependencies(steps)
+    by_id = {step["id"]: (i, step) for i, step in enumerate(steps, 1)}
+    pending = dict(deps)
+    done: set[str] = set()
+    running: dict[Future, str] = {}
+    max_workers = max(1, min(len(steps), os.cpu_count() or 1))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        def _submit_ready() -> None:
+            for step_id in [sid for sid, req in pending.items() if req <= done]:
+                del pending[step_id]
+                running[pool.submit(run_step, *by_id[step_id])] = step_id
+
+        _submit_ready()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step_id = running.pop(future)
+                future.result()  # ส่งต่อ exception ของ step ที่ล้มเหลว
+                done.add(step_id)
+            _submit_ready()
+
+    if pending:
+        raise RuntimeError(f"Circular step dependencies: {sorted(pending)}")
+
+
+def _disabled_pipeline_summary(run_id: str) -> dict:
+    """สรุปผลเมื่อ pipeline ถูกปิดด้วย PIPELINE_ENABLED=false (ไม่มีการเขียนไฟล์)"""
+    log("Pipeline disabled by PIPELINE_ENABLED=false", "INFO")
+    print("Pipeline disabled by PIPELINE_ENABLED=false")
+    return {
+        "pipeline": "unknown",
+        "run_id": run_id,
+        "started_at": datetime.now().isoformat(),
+        "total_steps": 0,
+        "successful": 0,
+        "failed": 0,
+        "results": {},
+        "output_dir": str(ROOT / "output" / run_id),
+        "status": "disabled",
+    }
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_pipeline_bytes(data: bytes, is_json: bool) -> dict:
+    """
+    parse เนื้อหาไฟล์ pipeline (cache ตามเนื้อหาไฟล์ จึงไม่คืนผลเก่าแม้ mtime/size ไม่เปลี่ยน)
+    ไฟล์ .json ใช้ JSON parser โดยตรง ที่เหลือ parse เป็น YAML
+    """
+    if is_json:
+        return _loads_json(data)
+    return yaml.load(data.decode("utf-8"), Loader=_YamlLoader)
+
+
+def _load_pipeline(pipeline_path: Path) -> dict:
+    """อ่านและ parse ไฟล์ YAML pipeline (ใช้ผลที่ cache ไว้ถ้าเนื้อหาไฟล์ไม่เปลี่ยน)"""
+    with open(pipeline_path, "rb") as f:
+        data = f.read()
+    cfg = _parse_pipeline_bytes(data, os.fspath(pipeline_path).endswith(".json"))
+    # คืนสำเนาเพื่อไม่ให้ผู้เรียกแก้ไขค่าที่อยู่ใน cache
+    return copy.deepcopy(cfg)
+
+
 def run_pipeline(pipeline_path: Path, run_id: str):
     """รัน pipeline ตามไฟล์ YAML"""
     log(f"Loading pipeline: {pipeline_path}")
 
-    pipeline_enabled = parse_pipeline_enabled(os.environ.get("PIPELINE_ENABLED"))
-    if not pipeline_enabled:
-        log("Pipeline disabled by PIPELINE_ENABLED=false", "INFO")
-        print("Pipeline disabled by PIPELINE_ENABLED=false")
-        return {
-            "pipeline": "unknown",
-            "run_id": run_id,
-            "started_at": datetime.now().isoformat(),
-            "total_steps": 0,
-            "successful": 0,
-            "failed": 0,
-            "results": {},
-            "output_dir": str(ROOT / "output" / run_id),
-            "status": "disabled",
-        }
+    if not parse_pipeline_enabled(os.environ.get("PIPELINE_ENABLED")):
+        return _disabled_pipeline_summary(run_id)
 
-    with open(pipeline_path, encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
+    return run_pipeline_spec(_load_pipeline(pipeline_path), run_id)
+
+
+def run_pipeline_spec(cfg: dict, run_id: str):
+    """รัน pipeline จาก dict ที่ parse แล้ว (โครงสร้างเดียวกับไฟล์ YAML)"""
+    if not parse_pipeline_enabled(os.environ.get("PIPELINE_ENABLED")):
+        return _disabled_pipeline_summary(run_id)
 
     pipeline_name = cfg.get("pipeline", "unknown")
     steps = cfg.get("steps", [])
@@ -3665,6 +3830,7 @@ def run_pipeline(pipeline_path: Path, run_id: str):
     results = {}
     root_dir = ROOT.resolve()
     post_templates_ran = False
+    post_templates_lock = threading.Lock()
 
     def _maybe_run_post_templates(step_uses: str, step_result: object) -> None:
         """
@@ -3679,15 +3845,21 @@ def run_pipeline(pipeline_path: Path, run_id: str):
             - จะรันหลัง quality.gate หรือหลัง video.render (เมื่อไม่มี quality.gate)
         """
         nonlocal post_templates_ran
-        if post_templates_ran or has_post_templates:
+        if has_post_templates:
             return
         if isinstance(step_result, PlannedArtifacts) and step_result.dry_run:
             return
-        if step_uses == "quality.gate" or (
-            step_uses == "video.render" and not has_quality_gate
+        if not (
+            step_uses == "quality.gate"
+            or (step_uses == "video.render" and not has_quality_gate)
         ):
-            # ถ้าไม่มี step post_templates ที่ชัดเจน ให้รันแบบโดยอัตโนมัติหลังจาก
-            # quality gate (แนะนำ) หรือหลัง video render เป็น fallback
+            return
+        # ถ้าไม่มี step post_templates ที่ชัดเจน ให้รันแบบโดยอัตโนมัติหลังจาก
+        # quality gate (แนะนำ) หรือหลัง video render เป็น fallback
+        # (ใช้ lock เพราะ step ที่มี depends_on อาจรันพร้อมกันหลาย thread)
+        with post_templates_lock:
+            if post_templates_ran:
+                return
             try:
                 _run_post_templates_step(run_id, root_dir)
                 post_templates_ran = True
@@ -3698,7 +3870,7 @@ def run_pipeline(pipeline_path: Path, run_id: str):
                 )
                 raise
 
-    for i, step in enumerate(steps, 1):
+    def _run_step(i: int, step: dict) -> None:
         step_id = step["id"]
         uses = step["uses"]
 
@@ -3728,6 +3900,16 @@ def run_pipeline(pipeline_path: Path, run_id: str):
             results[step_id] = {"status": "error", "error": str(e)}
             raise
 
+    if any(isinstance(step, dict) and "depends_on" in step for step in steps):
+        _run_steps_concurrently(steps, _run_step)
+        # เรียงผลลัพธ์ตามลำดับใน pipeline (ไม่ใช่ลำดับที่ thread ทำเสร็จ)
+        results = {
+            step["id"]: results[step["id"]] for step in steps if step["id"] in results
+        }
+    else:
+        for i, step in enumerate(steps, 1):
+            _run_step(i, step)
+
     # สรุปผล
     summary = {
         "pipeline": pipeline_name,
@@ -3763,7 +3945,9 @@ def main():
     parser = argparse.ArgumentParser(
         description="Dhamma Channel Automation - Orchestrator"
     )
-    parser.add_argument("--pipeline", required=True, help="Path to YAML pipeline file")
+    parser.add_argument(
+        "--pipeline", required=True, help="Path to YAML (or .json) pipeline file"
+    )
     parser.add_argument("--run-id", default=None, help="Run ID (default: timestamp)")
     parser.add_argument(
         "--topic", default=None, help="Topic title to use (overrides mock data)"
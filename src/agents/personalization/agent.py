@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import json
-from collections.abc import Collection, Iterable
+from collections.abc import Callable, Collection, Iterable
 from dataclasses import dataclass
 from datetime import date, timedelta
 from importlib import resources
@@ -122,12 +122,13 @@ class PersonalizationAgent(BaseAgent[PersonalizationInput, PersonalizationOutput
     MODERATE_ENGAGEMENT_THRESHOLD = 5
     MODERATE_ENGAGEMENT_BONUS = 2.0
 
-    def __init__(self) -> None:
+    def __init__(self, now: Callable[[], date] = date.today) -> None:
         super().__init__(
             name="PersonalizationAgent",
             version="1.0.0",
             description="สร้างคำแนะนำเฉพาะบุคคลตามโปรไฟล์และพฤติกรรมผู้ชม",
         )
+        self.now = now
 
     def run(self, input_data: PersonalizationInput) -> PersonalizationOutput:
         request = input_data.personalization_request
@@ -363,7 +364,7 @@ class PersonalizationAgent(BaseAgent[PersonalizationInput, PersonalizationOutput
         return max(0.0, min(100.0, confidence))
 
     def _recent_completed_videos(self, request: PersonalizationRequest) -> set[str]:
-        cutoff = date.today() - timedelta(days=self.RECENT_VIEW_THRESHOLD)
+        cutoff = self.now() - timedelta(days=self.RECENT_VIEW_THRESHOLD)
         recent_completed = {
             item.video_id
             for item in request.view_history
@@ -197,12 +197,12 @@ def _read_json_file(path: Path) -> dict[str, Any] | None:
         ValueError: ถ้าไฟล์มี JSON ที่ไม่ถูกต้อง หรือไม่ใช่ JSON object
     """
     try:
-        raw = path.read_text(encoding="utf-8")
+        raw = path.read_bytes()
     except FileNotFoundError:
         return None
     try:
         data = json.loads(raw)
-    except json.JSONDecodeError as exc:
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
         raise ValueError(f"Invalid JSON in {path}") from exc
     if not isinstance(data, dict):
         raise ValueError(f"Expected JSON object in {path}")
@@ -230,7 +230,21 @@ def _extract_env_params(payload: str) -> tuple[dict[str, str], set[str]]:
         raise ValueError("PIPELINE_PARAMS_JSON must be valid JSON") from exc
     if not isinstance(data, dict):
         raise ValueError("PIPELINE_PARAMS_JSON must be a JSON object")
+    return _extract_param_fields(data)
+
+
+def _extract_param_fields(
+    data: Mapping[str, Any],
+) -> tuple[dict[str, str], set[str]]:
+    """
+    แยกค่าฟิลด์เนื้อหาจากพารามิเตอร์ที่ parse แล้ว
+
+    Args:
+        data: dictionary ของพารามิเตอร์ (เช่น ผลจาก PIPELINE_PARAMS_JSON)
 
+    Returns:
+        tuple[dict[str, str], set[str]]: คู่ของ (values, present)
+    """
     values: dict[str, str] = {}
     present: set[str] = set()
     for key in CONTENT_FIELDS:
@@ -396,6 +410,7 @@ def _build_placeholder_values(
     *,
     base_dir: Path,
     pipeline_params_json: str | None = None,
+    pipeline_params: Mapping[str, Any] | None = None,
 ) -> tuple[dict[str, str], list[str]]:
     """
     สร้าง dictionary ของค่า placeholder จากหลายแหล่งข้อมูลตามลำดับความสำคัญ
@@ -404,6 +419,8 @@ def _build_placeholder_values(
         run_id: run identifier
         base_dir: directory ฐานของ repository
         pipeline_params_json: JSON string จาก PIPELINE_PARAMS_JSON (ถ้ามี)
+        pipeline_params: พารามิเตอร์ที่ parse แล้ว ใช้แทน pipeline_params_json
+            และ env โดยไม่ต้อง serialize เป็น JSON (ถ้ามี)
 
     Returns:
         tuple[dict[str, str], list[str]]: คู่ของ (values, sources) โดย
@@ -421,13 +438,19 @@ def _build_placeholder_values(
     assigned: set[str] = set()
     sources: list[str] = []
 
-    env_payload = (
-        pipeline_params_json
-        if pipeline_params_json is not None
-        else os.environ.get(PIPELINE_PARAMS_ENV)
-    )
-    if env_payload is not None and env_payload.strip():
-        env_values, env_present = _extract_env_params(env_payload)
+    env_fields: tuple[dict[str, str], set[str]] | None = None
+    if pipeline_params is not None:
+        env_fields = _extract_param_fields(pipeline_params)
+    else:
+        env_payload = (
+            pipeline_params_json
+            if pipeline_params_json is not None
+            else os.environ.get(PIPELINE_PARAMS_ENV)
+        )
+        if env_payload is not None and env_payload.strip():
+            env_fields = _extract_env_params(env_payload)
+    if env_fields is not None:
+        env_values, env_present = env_fields
         _apply_source(
             values=values,
             assigned=assigned,
@@ -529,6 +552,7 @@ def render_post_templates(
     *,
     base_dir: Path = REPO_ROOT,
     pipeline_params_json: str | None = None,
+    pipeline_params: Mapping[str, Any] | None = None,
 ) -> dict[str, Any]:
     """
     เรนเดอร์เทมเพลตโพสต์ทั้ง short และ long
@@ -537,6 +561,8 @@ def render_post_templates(
         run_id: run identifier
         base_dir: directory ฐานของ repository
         pipeline_params_json: JSON string จาก PIPELINE_PARAMS_JSON (ถ้ามี)
+        pipeline_params: พารามิเตอร์ที่ parse แล้ว ใช้แทน pipeline_params_json
+            และ env โดยไม่ต้อง serialize เป็น JSON (ถ้ามี)
 
     Returns:
         dict[str, Any]: dictionary ที่มี run_id, short, long, lang, platform,
@@ -549,6 +575,7 @@ def render_post_templates(
         run_id,
         base_dir=base_dir,
         pipeline_params_json=pipeline_params_json,
+        pipeline_params=pipeline_params,
     )
 
     short_path, short_template = load_template("short", base_dir=base_dir)
@@ -667,6 +694,7 @@ def generate_post_content_summary(
     *,
     base_dir: Path = REPO_ROOT,
     pipeline_params_json: str | None = None,
+    pipeline_params: Mapping[str, Any] | None = None,
     checked_at: datetime | None = None,
 ) -> tuple[dict[str, Any], Path]:
     """
@@ -676,6 +704,8 @@ def generate_post_content_summary(
         run_id: run identifier
         base_dir: directory ฐานของ repository
         pipeline_params_json: JSON string จาก PIPELINE_PARAMS_JSON (ถ้ามี)
+        pipeline_params: พารามิเตอร์ที่ parse แล้ว ใช้แทน pipeline_params_json
+            และ env โดยไม่ต้อง serialize เป็น JSON (ถ้ามี)
         checked_at: timestamp สำหรับบันทึกเวลาที่ตรวจสอบ
 
     Returns:
@@ -691,6 +721,7 @@ def generate_post_content_summary(
         run_id,
         base_dir=base_dir,
         pipeline_params_json=pipeline_params_json,
+        pipeline_params=pipeline_params,
     )
     summary = build_post_content_summary(rendered, checked_at=checked_at)
     output_path = write_post_content_summary(run_id, summary, base_dir=base_dir)
@@ -3,6 +3,7 @@
 ป้องกันการฝัง prompt ยาวๆ ในโค้ด
 """
 
+import functools
 from pathlib import Path
 
 
@@ -55,6 +56,7 @@ def load_prompt(path: str | Path, encoding: str = "utf-8") -> str:
         raise PromptLoadError(f"ไม่สามารถอ่านไฟล์ {prompt_path}: {e}") from e
 
 
+@functools.lru_cache(maxsize=128)
 def get_prompt_path(prompt_name: str, prompts_dir: str = "prompts") -> Path:
     """
     สร้าง path สำหรับไฟล์ prompt
@@ -65,6 +67,10 @@ def get_prompt_path(prompt_name: str, prompts_dir: str = "prompts") -> Path:
 
     Returns:
         Path object ไปยังไฟล์ prompt
+
+    Note:
+        ผลลัพธ์ถูก cache ตาม (prompt_name, prompts_dir) เพราะต้องไล่ exists()
+        ขึ้นไปทีละโฟลเดอร์ Path เป็น immutable จึงแชร์ผลลัพธ์ได้อย่างปลอดภัย
     """
 
     # หา root directory ของโครงการ
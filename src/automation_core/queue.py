@@ -108,8 +108,8 @@ class FileQueue:
 
     def _load_job(self, path: Path) -> JobSpec | None:
         try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-        except (OSError, json.JSONDecodeError):
+            data = json.loads(path.read_bytes())
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
             return None
         try:
             return JobSpec.model_validate(data)
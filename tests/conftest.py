@@ -0,0 +1,108 @@
+"""
+Shared pytest fixtures
+"""
+
+import shutil
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# ให้ import orchestrator (อยู่ที่ root ของ repo) ได้ครั้งเดียวสำหรับทุกโมดูลเทส
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import orchestrator  # noqa: E402
+from tests.helpers import write_post_templates  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app_instance():
+    """Import FastAPI app once per test session (once per xdist worker)"""
+    from app.main import app
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def shared_client(app_instance):
+    """Session-scoped test client; app startup runs once per worker"""
+    with TestClient(app_instance) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def pipeline_specs():
+    """
+    Pipeline ที่ parse แล้ว (dict) สำหรับ orchestrator.run_pipeline_spec
+    ใช้ร่วมกันทั้ง session จึงห้ามแก้ไข dict ในเทส
+    """
+    return {
+        "post_templates_enabled": {
+            "pipeline": "post_templates_enabled",
+            "steps": [{"id": "post_templates", "uses": "post_templates"}],
+        },
+        "explicit_post_templates": {
+            "pipeline": "explicit_post_templates",
+            "steps": [
+                {"id": "quality_gate", "uses": "quality.gate"},
+                {"id": "post_templates", "uses": "post.templates"},
+            ],
+        },
+        "quality_gate": {
+            "pipeline": "quality_gate",
+            "steps": [{"id": "quality_gate", "uses": "quality.gate"}],
+        },
+    }
+
+
+@pytest.fixture(scope="session")
+def _post_templates_master(tmp_path_factory):
+    """สร้างไฟล์ templates/post ครั้งเดียวต่อ session"""
+    master_dir = tmp_path_factory.mktemp("post_templates_master")
+    write_post_templates(master_dir)
+    return master_dir
+
+
+@pytest.fixture
+def post_templates(tmp_path, _post_templates_master):
+    """คัดลอก templates/post ที่สร้างไว้แล้วลงใน tmp_path ของเทส"""
+    shutil.copytree(_post_templates_master, tmp_path, dirs_exist_ok=True)
+    return tmp_path / "templates" / "post"
+
+
+def _apply_env(monkeypatch, values: Mapping[str, str | None]) -> None:
+    """ตั้ง env หลายตัวในครั้งเดียว ค่า None หมายถึงลบตัวแปรนั้นออก"""
+    for key, value in values.items():
+        if value is None:
+            monkeypatch.delenv(key, raising=False)
+        else:
+            monkeypatch.setenv(key, value)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """
+    คืนฟังก์ชัน env({...}) สำหรับตั้ง/ลบ env หลายตัวพร้อมกัน
+    ค่าทั้งหมดถูกคืนสภาพเดิมโดย monkeypatch เมื่อจบเทส
+    """
+
+    def _set(values: Mapping[str, str | None]) -> None:
+        _apply_env(monkeypatch, values)
+
+    return _set
+
+
+@pytest.fixture
+def orchestrator_env(tmp_path, monkeypatch):
+    """
+    ตั้งค่า orchestrator ให้ใช้ tmp_path เป็น ROOT และเปิด PIPELINE_ENABLED
+    โมดูล test_orchestrator_* ใช้ผ่าน pytestmark (usefixtures) จึงมีผลกับทุกเทส
+    เทสที่ต้องการปิด pipeline ให้ monkeypatch.setenv("PIPELINE_ENABLED", "false") เอง
+    """
+    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
+    _apply_env(monkeypatch, {"PIPELINE_ENABLED": "true", "PIPELINE_PARAMS_JSON": None})
+    return orchestrator
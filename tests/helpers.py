@@ -1,8 +1,119 @@
 from __future__ import annotations
 
-import json
+import os
+import subprocess
 from pathlib import Path
 
+try:  # orjson เร็วกว่า json มาตรฐานหลายเท่า
+    import orjson
+
+    def dump_json(obj: object) -> bytes:
+        """แปลง obj เป็น JSON bytes (UTF-8, compact)"""
+        return orjson.dumps(obj)
+
+    load_json = orjson.loads
+except ModuleNotFoundError:  # pragma: no cover - fallback path
+    import json
+
+    def dump_json(obj: object) -> bytes:
+        """แปลง obj เป็น JSON bytes (UTF-8, compact)"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    load_json = json.loads
+
+SHORT_TEMPLATE_BYTES = b"{{hook}}\n{{summary}}\n\n{{cta}}\n{{hashtags}}\n"
+LONG_TEMPLATE_BYTES = (
+    b"{{title}}\n\n{{hook}}\n\n{{summary}}\n\n{{cta}}\n\n{{hashtags}}\n"
+)
+
+
+# ผลลัพธ์ subprocess.run ที่สำเร็จ ใช้ร่วมกันทุกเทส (ผู้เรียกไม่ได้แก้ไขหรืออ่าน args)
+FFMPEG_OK = subprocess.CompletedProcess(["ffmpeg"], 0, stdout="ok", stderr="")
+
+
+class CountingStub:
+    """
+    ตัวแทนฟังก์ชันที่นับจำนวนครั้งที่ถูกเรียกและคืนค่าคงที่
+    (เบากว่า unittest.mock.Mock เพราะไม่เก็บ arguments ของทุกการเรียก)
+    """
+
+    __slots__ = ("call_count", "return_value")
+
+    def __init__(self, return_value: object = None) -> None:
+        self.call_count = 0
+        self.return_value = return_value
+
+    def __call__(self, *_args, **_kwargs) -> object:
+        self.call_count += 1
+        return self.return_value
+
+
+def write_bytes(path: str | os.PathLike[str], data: bytes) -> None:
+    """
+    เขียน bytes ลงไฟล์ด้วย open/write/close ระดับ fd (ไม่ผ่าน text encoder)
+
+    Args:
+        path: ไฟล์ปลายทาง (โฟลเดอร์แม่ต้องมีอยู่แล้ว)
+        data: ข้อมูลที่ encode แล้ว
+
+    Returns:
+        None
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            # os.write อาจเขียนได้ไม่ครบ (short write) ให้วนจนกว่าจะครบทุกไบต์
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def snapshot_paths(root: Path) -> list[str]:
+    """
+    รายการ path ทั้งหมดใต้ root (relative, POSIX) เรียงลำดับแล้ว
+
+    ใช้ os.walk ซึ่งอาศัย os.scandir จึงไม่สร้าง Path และไม่ stat ทีละ entry
+
+    Args:
+        root: โฟลเดอร์ที่ต้องการ snapshot
+
+    Returns:
+        list ของ path แบบ relative เช่น ["output", "output/run_1"]
+    """
+    paths: list[str] = []
+    prefix_len = len(os.path.join(root, ""))
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = dirpath[prefix_len:]
+        for name in dirnames + filenames:
+            rel = os.path.join(rel_dir, name) if rel_dir else name
+            paths.append(rel.replace(os.sep, "/"))
+    paths.sort()
+    return paths
+
+
+def prepare_run_dirs(base_dir: Path, run_id: str, *, voiceovers: bool = False) -> Path:
+    """
+    สร้างโฟลเดอร์ output/<run_id>/artifacts (และ data/voiceovers/<run_id>) ล่วงหน้าครั้งเดียว
+    เพื่อให้ helper ที่เขียนไฟล์ลงไปไม่ต้อง mkdir ซ้ำ
+
+    Args:
+        base_dir: โฟลเดอร์หลัก (มักจะเป็น tmp_path ในเทส)
+        run_id: รหัสการรัน
+        voiceovers: สร้าง data/voiceovers/<run_id> ด้วยหรือไม่
+
+    Returns:
+        Path ไปยังโฟลเดอร์ artifacts
+    """
+    artifacts_dir = base_dir / "output" / run_id / "artifacts"
+    os.makedirs(artifacts_dir, exist_ok=True)
+    if voiceovers:
+        os.makedirs(base_dir / "data" / "voiceovers" / run_id, exist_ok=True)
+    return artifacts_dir
+
 
 def write_post_templates(base_dir: Path) -> None:
     """
@@ -16,13 +127,8 @@ def write_post_templates(base_dir: Path) -> None:
     """
     templates_dir = base_dir / "templates" / "post"
     templates_dir.mkdir(parents=True, exist_ok=True)
-    (templates_dir / "short.md").write_text(
-        "{{hook}}\n{{summary}}\n\n{{cta}}\n{{hashtags}}\n", encoding="utf-8"
-    )
-    (templates_dir / "long.md").write_text(
-        "{{title}}\n\n{{hook}}\n\n{{summary}}\n\n{{cta}}\n\n{{hashtags}}\n",
-        encoding="utf-8",
-    )
+    write_bytes(templates_dir / "short.md", SHORT_TEMPLATE_BYTES)
+    write_bytes(templates_dir / "long.md", LONG_TEMPLATE_BYTES)
 
 
 def write_metadata(
@@ -62,7 +168,8 @@ def write_metadata(
         "language": language,
         "platform": platform,
     }
-    metadata_path.write_text(
-        json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8"
+    write_bytes(
+        metadata_path,
+        dump_json(metadata),
     )
     return metadata_path
@@ -6,10 +6,16 @@ Tests for FlowBiz contract endpoints
 import os
 from unittest.mock import patch
 
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 
 
+def _json(response):
+    """Parse response body with orjson (faster than response.json())"""
+    return orjson.loads(response.content)
+
+
 @pytest.fixture
 def client():
     """Create test client for FastAPI app"""
@@ -35,53 +41,53 @@ def mock_env_vars():
 class TestHealthzEndpoint:
     """Tests for /healthz endpoint"""
 
-    def test_healthz_returns_200(self, client):
+    def test_healthz_returns_200(self, shared_client):
         """healthz endpoint ควรคืนค่า HTTP 200"""
-        response = client.get("/healthz")
+        response = shared_client.get("/healthz")
         assert response.status_code == 200
 
-    def test_healthz_returns_json(self, client):
+    def test_healthz_returns_json(self, shared_client):
         """healthz endpoint ควรคืนค่า JSON"""
-        response = client.get("/healthz")
+        response = shared_client.get("/healthz")
         assert response.headers["content-type"] == "application/json"
 
-    def test_healthz_has_required_fields(self, client):
+    def test_healthz_has_required_fields(self, shared_client):
         """healthz endpoint ควรมี fields ที่จำเป็น"""
-        response = client.get("/healthz")
-        data = response.json()
+        response = shared_client.get("/healthz")
+        data = _json(response)
 
         assert "status" in data
         assert "service" in data
         assert "version" in data
 
-    def test_healthz_status_is_ok(self, client):
+    def test_healthz_status_is_ok(self, shared_client):
         """healthz endpoint ควรมี status = ok"""
-        response = client.get("/healthz")
-        data = response.json()
+        response = shared_client.get("/healthz")
+        data = _json(response)
         assert data["status"] == "ok"
 
-    def test_healthz_service_name_from_config(self, client):
+    def test_healthz_service_name_from_config(self, shared_client):
         """healthz endpoint ควรใช้ service name จาก config"""
-        response = client.get("/healthz")
-        data = response.json()
+        response = shared_client.get("/healthz")
+        data = _json(response)
 
         # Service name should be set from APP_SERVICE_NAME or fallback
         assert isinstance(data["service"], str)
         assert len(data["service"]) > 0
 
-    def test_healthz_version_from_config(self, client):
+    def test_healthz_version_from_config(self, shared_client):
         """healthz endpoint ควรใช้ version จาก config"""
-        response = client.get("/healthz")
-        data = response.json()
+        response = shared_client.get("/healthz")
+        data = _json(response)
 
         # Version should be set from FLOWBIZ_VERSION
         assert isinstance(data["version"], str)
         assert len(data["version"]) > 0
 
-    def test_healthz_no_authentication_required(self, client):
+    def test_healthz_no_authentication_required(self, shared_client):
         """healthz endpoint ไม่ต้องการ authentication"""
         # Should not require session or credentials
-        response = client.get("/healthz")
+        response = shared_client.get("/healthz")
         assert response.status_code == 200
         # Not redirected to login
         assert response.headers.get("location") is None
@@ -90,61 +96,61 @@ class TestHealthzEndpoint:
 class TestMetaEndpoint:
     """Tests for /v1/meta endpoint"""
 
-    def test_meta_returns_200(self, client):
+    def test_meta_returns_200(self, shared_client):
         """meta endpoint ควรคืนค่า HTTP 200"""
-        response = client.get("/v1/meta")
+        response = shared_client.get("/v1/meta")
         assert response.status_code == 200
 
-    def test_meta_returns_json(self, client):
+    def test_meta_returns_json(self, shared_client):
         """meta endpoint ควรคืนค่า JSON"""
-        response = client.get("/v1/meta")
+        response = shared_client.get("/v1/meta")
         assert response.headers["content-type"] == "application/json"
 
-    def test_meta_has_required_fields(self, client):
+    def test_meta_has_required_fields(self, shared_client):
         """meta endpoint ควรมี fields ที่จำเป็นทั้งหมด"""
-        response = client.get("/v1/meta")
-        data = response.json()
+        response = shared_client.get("/v1/meta")
+        data = _json(response)
 
         required_fields = ["service", "environment", "version", "build_sha"]
         for field in required_fields:
             assert field in data, f"Missing required field: {field}"
 
-    def test_meta_service_name_from_config(self, client):
+    def test_meta_service_name_from_config(self, shared_client):
         """meta endpoint ควรใช้ service name จาก config"""
-        response = client.get("/v1/meta")
-        data = response.json()
+        response = shared_client.get("/v1/meta")
+        data = _json(response)
 
         assert isinstance(data["service"], str)
         assert len(data["service"]) > 0
 
-    def test_meta_environment_from_config(self, client):
+    def test_meta_environment_from_config(self, shared_client):
         """meta endpoint ควรใช้ environment จาก config"""
-        response = client.get("/v1/meta")
-        data = response.json()
+        response = shared_client.get("/v1/meta")
+        data = _json(response)
 
         assert isinstance(data["environment"], str)
         assert data["environment"] in ["dev", "staging", "prod", "test"]
 
-    def test_meta_version_from_config(self, client):
+    def test_meta_version_from_config(self, shared_client):
         """meta endpoint ควรใช้ version จาก config"""
-        response = client.get("/v1/meta")
-        data = response.json()
+        response = shared_client.get("/v1/meta")
+        data = _json(response)
 
         assert isinstance(data["version"], str)
         assert len(data["version"]) > 0
 
-    def test_meta_build_sha_from_config(self, client):
+    def test_meta_build_sha_from_config(self, shared_client):
         """meta endpoint ควรใช้ build_sha จาก config"""
-        response = client.get("/v1/meta")
-        data = response.json()
+        response = shared_client.get("/v1/meta")
+        data = _json(response)
 
         assert isinstance(data["build_sha"], str)
         assert len(data["build_sha"]) > 0
 
-    def test_meta_no_authentication_required(self, client):
+    def test_meta_no_authentication_required(self, shared_client):
         """meta endpoint ไม่ต้องการ authentication"""
         # Should not require session or credentials
-        response = client.get("/v1/meta")
+        response = shared_client.get("/v1/meta")
         assert response.status_code == 200
         # Not redirected to login
         assert response.headers.get("location") is None
@@ -269,20 +275,21 @@ class TestBackwardsCompatibility:
         response = client.get("/", follow_redirects=True)
         assert response.status_code == 200
 
-    def test_legacy_app_name_still_works(self):
+    def test_legacy_app_name_still_works(self, monkeypatch):
         """Legacy APP_NAME env var ควรยังทำงานได้"""
-        with patch.dict(os.environ, {"APP_NAME": "legacy-name"}, clear=False):
-            import importlib
+        monkeypatch.setenv("APP_NAME", "legacy-name")
 
-            from app import config
+        import importlib
 
-            importlib.reload(config)
+        from app import config
+
+        importlib.reload(config)
 
-            # APP_NAME should fallback to APP_SERVICE_NAME
-            assert config.APP_NAME in [
-                "legacy-name",
-                config.APP_SERVICE_NAME,
-            ]
+        # APP_NAME should fallback to APP_SERVICE_NAME
+        assert config.APP_NAME in [
+            "legacy-name",
+            config.APP_SERVICE_NAME,
+        ]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+
+import pytest
+
+import orchestrator
+
+
+def test_write_json_matches_stdlib_json_output(tmp_path):
+    """ไฟล์ที่เขียนต้องตรงกับ json.dumps มาตรฐานทุกไบต์ ไม่ว่าจะติดตั้ง orjson หรือไม่"""
+    payload = {
+        "title": "ธรรมะก่อนนอน",
+        "nan": float("nan"),
+        "inf": float("inf"),
+        "big": 1e16,
+        "nested": {"values": [1, 2.5, None]},
+    }
+    target = tmp_path / "summary.json"
+
+    orchestrator.write_json(target, payload)
+
+    expected = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    assert target.read_bytes() == expected
+
+
+def test_write_json_rejects_datetime(tmp_path):
+    """datetime ต้อง raise TypeError เหมือน json.dumps และไม่ทิ้งไฟล์ไว้"""
+    target = tmp_path / "summary.json"
+
+    with pytest.raises(TypeError):
+        orchestrator.write_json(target, {"at": datetime(2026, 1, 1, tzinfo=UTC)})
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_json_removes_temp_file_when_replace_fails(tmp_path, monkeypatch):
+    """ถ้า os.replace ล้มเหลว ต้องลบไฟล์ชั่วคราวทิ้งและ raise ข้อผิดพลาดเดิม"""
+    target = tmp_path / "summary.json"
+
+    def failing_replace(_src, _dst):
+        raise OSError("replace failed")
+
+    monkeypatch.setattr(orchestrator.os, "replace", failing_replace)
+
+    with pytest.raises(OSError, match="replace failed"):
+        orchestrator.write_json(target, {"ok": True})
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_json_concurrent_writers_leave_valid_file(tmp_path):
+    """หลาย thread เขียน path เดียวกันต้องได้ไฟล์ JSON ที่สมบูรณ์จาก writer ใด writer หนึ่ง"""
+    target = tmp_path / "summary.json"
+    payloads = [{"writer": i, "data": "x" * 4096} for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda obj: orchestrator.write_json(target, obj), payloads))
+
+    assert json.loads(target.read_bytes()) in payloads
+    assert [p.name for p in tmp_path.iterdir()] == ["summary.json"]
+
+
+def test_write_json_respects_umask(tmp_path):
+    """สิทธิ์ไฟล์ต้องเป็นไปตาม umask ของ process เหมือนการเขียนไฟล์ปกติ"""
+    target = tmp_path / "summary.json"
+    previous = os.umask(0o002)
+    try:
+        orchestrator.write_json(target, {"ok": True})
+    finally:
+        os.umask(previous)
+
+    assert stat.S_IMODE(target.stat().st_mode) == 0o664
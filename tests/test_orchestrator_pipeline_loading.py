@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+
+import orchestrator
+from tests.helpers import write_bytes
+
+
+def test_load_pipeline_reuses_parsed_yaml_until_file_changes(tmp_path, monkeypatch):
+    pipeline_path = tmp_path / "pipeline.yml"
+    write_bytes(
+        pipeline_path,
+        b"pipeline: cached\nsteps:\n  - id: quality_gate\n    uses: quality.gate\n",
+    )
+
+    parse_calls: list[str] = []
+    original_load = orchestrator.yaml.load
+
+    def counting_load(stream, Loader):  # noqa: N803 - mirrors yaml.load signature
+        parse_calls.append(stream)
+        return original_load(stream, Loader=Loader)
+
+    monkeypatch.setattr(orchestrator.yaml, "load", counting_load)
+    orchestrator._parse_pipeline_bytes.cache_clear()
+
+    first = orchestrator._load_pipeline(pipeline_path)
+    first["steps"].clear()  # แก้ไขสำเนาต้องไม่กระทบ cache
+    second = orchestrator._load_pipeline(pipeline_path)
+
+    assert len(parse_calls) == 1
+    assert second["pipeline"] == "cached"
+    assert second["steps"] == [{"id": "quality_gate", "uses": "quality.gate"}]
+
+    # เนื้อหาใหม่ขนาดเท่าเดิมและ mtime เดิม (เหมือนแก้ไฟล์ภายใน mtime tick เดียว)
+    # ต้อง parse ใหม่เพราะ cache ผูกกับเนื้อหาไฟล์
+    stat = pipeline_path.stat()
+    changed = b"pipeline: changed\nsteps: []\n".ljust(stat.st_size, b" ")
+    write_bytes(pipeline_path, changed)
+    os.utime(pipeline_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert pipeline_path.stat().st_size == stat.st_size
+
+    third = orchestrator._load_pipeline(pipeline_path)
+
+    assert len(parse_calls) == 2
+    assert third == {"pipeline": "changed", "steps": []}
+    orchestrator._parse_pipeline_bytes.cache_clear()
+
+
+def test_load_pipeline_parses_json_without_yaml(tmp_path, monkeypatch):
+    pipeline_path = tmp_path / "pipeline.json"
+    write_bytes(
+        pipeline_path,
+        b'{"pipeline": "json_spec", "steps": [{"id": "qg", "uses": "quality.gate"}]}',
+    )
+
+    def fail_load(stream, Loader):  # noqa: N803 - mirrors yaml.load signature
+        raise AssertionError("JSON pipelines must not go through PyYAML")
+
+    monkeypatch.setattr(orchestrator.yaml, "load", fail_load)
+    orchestrator._parse_pipeline_bytes.cache_clear()
+
+    cfg = orchestrator._load_pipeline(pipeline_path)
+
+    assert cfg == {
+        "pipeline": "json_spec",
+        "steps": [{"id": "qg", "uses": "quality.gate"}],
+    }
+    orchestrator._parse_pipeline_bytes.cache_clear()
@@ -1,33 +1,41 @@
 from __future__ import annotations
 
-import json
-import sys
 from pathlib import Path
 
-from tests.helpers import write_metadata, write_post_templates
+import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
 import orchestrator
+from tests.helpers import (
+    dump_json,
+    load_json,
+    prepare_run_dirs,
+    write_bytes,
+    write_metadata,
+)
 
+pytestmark = [pytest.mark.slow, pytest.mark.usefixtures("orchestrator_env")]
 
-def _write_video_render_summary(base_dir: Path, run_id: str) -> None:
+_VIDEO_RENDER_SUMMARY_BYTES = dump_json({"hook": "Hook line", "cta": "Call to action"})
+
+_PIPELINE_POST_TEMPLATES = b"""pipeline: post_templates_disabled
+steps:
+  - id: post_templates
+    uses: post_templates
+"""
+
+
+def _write_video_render_summary(artifacts_dir: Path) -> None:
     """
     เขียนไฟล์ video_render_summary.json สำหรับการทดสอบ
 
     Args:
-        base_dir: โฟลเดอร์หลักสำหรับสร้าง output
-        run_id: รหัสการรัน pipeline
+        artifacts_dir: โฟลเดอร์ artifacts ของ run (ต้องสร้างไว้แล้ว)
 
     Returns:
         None
     """
-    summary_path = (
-        base_dir / "output" / run_id / "artifacts" / "video_render_summary.json"
-    )
-    summary_path.parent.mkdir(parents=True, exist_ok=True)
-    summary = {"hook": "Hook line", "cta": "Call to action"}
-    summary_path.write_text(
-        json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8"
+    write_bytes(
+        artifacts_dir / "video_render_summary.json", _VIDEO_RENDER_SUMMARY_BYTES
     )
 
 
@@ -41,14 +49,15 @@ def _assert_relative(value: str) -> None:
     Raises:
         AssertionError: หาก path เป็น absolute หรือมี ".." อยู่ใน path
     """
-    path = Path(value)
-    assert not path.is_absolute()
-    assert ".." not in path.parts
+    # ตรวจด้วย str ตรงๆ (ไม่สร้าง Path) ครอบคลุมทั้ง POSIX และ drive letter ของ Windows
+    assert value
+    assert value[0] not in "/\\"
+    assert value[1:2] != ":"
+    assert ".." not in value.replace("\\", "/").split("/")
 
 
-def test_orchestrator_post_templates_enabled(tmp_path, monkeypatch):
+def test_orchestrator_post_templates_enabled(tmp_path, post_templates, pipeline_specs):
     run_id = "run_post_templates"
-    write_post_templates(tmp_path)
     write_metadata(
         tmp_path,
         run_id,
@@ -56,30 +65,16 @@ def test_orchestrator_post_templates_enabled(tmp_path, monkeypatch):
         description="Sample summary",
         tags=["#alpha", "#beta"],
     )
-    _write_video_render_summary(tmp_path, run_id)
+    _write_video_render_summary(prepare_run_dirs(tmp_path, run_id))
 
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: post_templates_enabled
-steps:
-  - id: post_templates
-    uses: post_templates
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.delenv("PIPELINE_PARAMS_JSON", raising=False)
-
-    orchestrator.run_pipeline(pipeline_path, run_id)
+    orchestrator.run_pipeline_spec(pipeline_specs["post_templates_enabled"], run_id)
 
     summary_path = (
         tmp_path / "output" / run_id / "artifacts" / "post_content_summary.json"
     )
     assert summary_path.exists()
 
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = load_json(summary_path.read_bytes())
     assert summary["schema_version"] == "v1"
 
     inputs = summary["inputs"]
@@ -98,16 +93,8 @@ steps:
 def test_orchestrator_post_templates_disabled_no_output(tmp_path, monkeypatch, capsys):
     run_id = "run_post_templates_disabled"
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: post_templates_disabled
-steps:
-  - id: post_templates
-    uses: post_templates
-""",
-        encoding="utf-8",
-    )
+    write_bytes(pipeline_path, _PIPELINE_POST_TEMPLATES)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
     monkeypatch.setenv("PIPELINE_ENABLED", "false")
     monkeypatch.setattr(
         "sys.argv",
@@ -129,13 +116,14 @@ steps:
     assert "Pipeline disabled by PIPELINE_ENABLED=false" in captured.out
 
 
-def test_explicit_post_templates_step_disables_fallback(tmp_path, monkeypatch):
+def test_explicit_post_templates_step_disables_fallback(
+    tmp_path, monkeypatch, post_templates, pipeline_specs
+):
     """
     เมื่อระบุขั้นตอน post_templates อย่างชัดเจนต้องไม่เรียกซ้ำแบบอัตโนมัติ
     และต้องไม่เขียนไฟล์เมื่อปิด PIPELINE_ENABLED
     """
     run_id = "explicit_post_templates_once"
-    write_post_templates(tmp_path)
     write_metadata(
         tmp_path,
         run_id,
@@ -143,22 +131,8 @@ def test_explicit_post_templates_step_disables_fallback(tmp_path, monkeypatch):
         description="Ensure single execution",
         tags=["#explicit"],
     )
-    _write_video_render_summary(tmp_path, run_id)
-
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: explicit_post_templates
-steps:
-  - id: quality_gate
-    uses: quality.gate
-  - id: post_templates
-    uses: post.templates
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
+    _write_video_render_summary(prepare_run_dirs(tmp_path, run_id))
+    pipeline_spec = pipeline_specs["explicit_post_templates"]
 
     calls: list[str] = []
     original = orchestrator._run_post_templates_step
@@ -174,7 +148,7 @@ steps:
 
     monkeypatch.setitem(orchestrator.AGENTS, "quality.gate", fake_quality_gate)
 
-    orchestrator.run_pipeline(pipeline_path, run_id)
+    orchestrator.run_pipeline_spec(pipeline_spec, run_id)
 
     post_summary_path = (
         tmp_path / "output" / run_id / "artifacts" / "post_content_summary.json"
@@ -186,7 +160,7 @@ steps:
     calls.clear()
     disabled_run = "explicit_post_templates_disabled"
 
-    orchestrator.run_pipeline(pipeline_path, disabled_run)
+    orchestrator.run_pipeline_spec(pipeline_spec, disabled_run)
 
     assert calls == []
     assert not (tmp_path / "output" / disabled_run).exists()
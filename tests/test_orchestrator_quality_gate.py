@@ -1,32 +1,144 @@
 from __future__ import annotations
 
-import json
+import os
+import shutil
 import subprocess
-import sys
 from pathlib import Path
-from unittest.mock import Mock
 
-from tests.helpers import write_metadata, write_post_templates
+import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
 import orchestrator
+from tests.helpers import (
+    FFMPEG_OK,
+    dump_json,
+    load_json,
+    prepare_run_dirs,
+    write_bytes,
+    write_metadata,
+    write_post_templates,
+)
+
+pytestmark = [pytest.mark.slow, pytest.mark.usefixtures("orchestrator_env")]
+
+# run_id และ output_mp4_rel ในเทสเป็น ASCII ล้วน จึง format ลง JSON ได้โดยตรง
+_VIDEO_RENDER_SUMMARY_TEMPLATE = (
+    '{{"schema_version":"v1","run_id":"{run_id}",'
+    '"output_mp4_path":"{output_mp4_rel}",'
+    '"hook":"Test hook line","cta":"Test call to action"}}'
+)
+
+_PAYLOAD_PASS = dump_json(
+    {"format": {"duration": "12.0"}, "streams": [{"codec_type": "audio"}]}
+)
+_PAYLOAD_DURATION_ZERO = dump_json(
+    {"format": {"duration": "0"}, "streams": [{"codec_type": "audio"}]}
+)
+_PAYLOAD_NO_AUDIO = dump_json(
+    {"format": {"duration": "12.0"}, "streams": [{"codec_type": "video"}]}
+)
+
+# run ที่ใช้ร่วมกันในเทส quality gate แบบ pass/fail (แต่ละเทสมี tmp_path ของตัวเอง)
+_QG_RUN_ID = "run_quality_gate"
+_QG_MP4_REL = f"output/{_QG_RUN_ID}/artifacts/demo.mp4"
+
+_PIPELINE_BOTH_STEPS = b"""pipeline: both_steps
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: bothsteps
+      dry_run: false
+  - id: quality_gate
+    uses: quality.gate
+"""
+_PIPELINE_EXPLICIT_POST_TEMPLATES = b"""pipeline: explicit_post_templates
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: explicitpost
+      dry_run: false
+  - id: quality_gate
+    uses: quality.gate
+  - id: post_templates
+    uses: post_templates
+"""
 
 
-def _write_video_render_summary(root: Path, run_id: str, output_mp4_rel: str) -> Path:
-    artifacts_dir = root / "output" / run_id / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
-    summary = {
-        "schema_version": "v1",
-        "run_id": run_id,
-        "output_mp4_path": output_mp4_rel,
-        "hook": "Test hook line",
-        "cta": "Test call to action",
-    }
+class _FfprobeStub:
+    """
+    ตัวแทน subprocess.run ที่คืนผล ffprobe ซึ่งสร้างไว้ล่วงหน้า
+    (คำสั่งอื่น เช่น ffmpeg จะได้ผลสำเร็จ "ok") และนับจำนวนครั้งที่ ffprobe ถูกเรียก
+    """
+
+    def __init__(self, returncode: int = 0, stdout: bytes = _PAYLOAD_PASS) -> None:
+        self._ffprobe_result = subprocess.CompletedProcess(
+            ["ffprobe"],
+            returncode,
+            stdout=stdout,
+            stderr=b"" if returncode == 0 else b"error",
+        )
+        self.ffprobe_calls = 0
+
+    def __call__(self, cmd, **_kwargs):
+        if "ffprobe" in str(cmd):
+            self.ffprobe_calls += 1
+            return self._ffprobe_result
+        return FFMPEG_OK
+
+
+@pytest.fixture(autouse=True)
+def ffprobe_stub(monkeypatch, request) -> _FfprobeStub:
+    """
+    ติดตั้ง _FfprobeStub แทน subprocess.run ให้ทุกเทสในโมดูลนี้
+    ผล ffprobe กำหนดได้ด้วย @pytest.mark.ffprobe(returncode, stdout)
+    """
+    marker = request.node.get_closest_marker("ffprobe")
+    stub = _FfprobeStub(*marker.args) if marker else _FfprobeStub()
+    monkeypatch.setattr(orchestrator.subprocess, "run", stub)
+    return stub
+
+
+def _write_video_render_summary(
+    artifacts_dir: Path, run_id: str, output_mp4_rel: str
+) -> Path:
     summary_path = artifacts_dir / "video_render_summary.json"
-    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    write_bytes(
+        summary_path,
+        _VIDEO_RENDER_SUMMARY_TEMPLATE.format(
+            run_id=run_id, output_mp4_rel=output_mp4_rel
+        ).encode("utf-8"),
+    )
     return summary_path
 
 
+@pytest.fixture(scope="module")
+def _quality_gate_scaffold(tmp_path_factory) -> Path:
+    """
+    สร้างโครง run สำหรับ quality gate ครั้งเดียวต่อโมดูล
+    (templates/post, metadata.json, artifacts/video_render_summary.json)
+    """
+    scaffold_dir = tmp_path_factory.mktemp("quality_gate_scaffold")
+    write_post_templates(scaffold_dir)
+    artifacts_dir = prepare_run_dirs(scaffold_dir, _QG_RUN_ID)
+    _write_video_render_summary(artifacts_dir, _QG_RUN_ID, _QG_MP4_REL)
+    write_metadata(
+        scaffold_dir,
+        _QG_RUN_ID,
+        title="Quality Gate Test",
+        description="Testing quality gate with post templates",
+        tags=["#quality", "#test"],
+    )
+    return scaffold_dir
+
+
+@pytest.fixture
+def quality_gate_artifacts(tmp_path, _quality_gate_scaffold) -> Path:
+    """คัดลอกโครง run ที่สร้างไว้ลง tmp_path แล้วคืนโฟลเดอร์ artifacts"""
+    shutil.copytree(_quality_gate_scaffold, tmp_path, dirs_exist_ok=True)
+    return tmp_path / "output" / _QG_RUN_ID / "artifacts"
+
+
 def _assert_summary_contract(summary: dict, run_id: str, output_mp4_rel: str):
     assert summary["schema_version"] == "v1"
     assert summary["run_id"] == run_id
@@ -49,316 +161,117 @@ def _assert_reason_contract(reason: dict, checked_at: str):
     assert reason["checked_at"] == checked_at
 
 
-def test_orchestrator_quality_gate_pass(tmp_path, monkeypatch):
-    run_id = "run_pass"
-    output_mp4_rel = f"output/{run_id}/artifacts/demo_pass.mp4"
-    mp4_path = tmp_path / output_mp4_rel
-    mp4_path.parent.mkdir(parents=True, exist_ok=True)
-    mp4_path.write_bytes(b"fake mp4")
+def test_orchestrator_quality_gate_pass(
+    tmp_path, quality_gate_artifacts, pipeline_specs
+):
+    run_id = _QG_RUN_ID
+    output_mp4_rel = _QG_MP4_REL
+    write_bytes(tmp_path / output_mp4_rel, b"fake mp4")
 
-    _write_video_render_summary(tmp_path, run_id, output_mp4_rel)
-    write_post_templates(tmp_path)
-    write_metadata(
-        tmp_path,
-        run_id,
-        title="Quality Gate Test",
-        description="Testing quality gate with post templates",
-        tags=["#quality", "#test"],
-    )
-
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: quality_gate_pass
-steps:
-  - id: quality_gate
-    uses: quality.gate
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    ffprobe_payload = json.dumps(
-        {"format": {"duration": "12.0"}, "streams": [{"codec_type": "audio"}]}
-    )
-
-    def fake_run(cmd, check=False, capture_output=True, text=True):
-        return subprocess.CompletedProcess(cmd, 0, stdout=ffprobe_payload, stderr="")
+    orchestrator.run_pipeline_spec(pipeline_specs["quality_gate"], run_id)
 
-    monkeypatch.setattr(orchestrator.subprocess, "run", fake_run)
-
-    orchestrator.run_pipeline(pipeline_path, run_id)
-
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "quality_gate_summary.json"
-    )
+    summary_path = quality_gate_artifacts / "quality_gate_summary.json"
     assert summary_path.exists()
 
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = load_json(summary_path.read_bytes())
     _assert_summary_contract(summary, run_id, output_mp4_rel)
     assert summary["decision"] == "pass"
     assert summary["reasons"] == []
 
     # Verify post_templates was auto-invoked after quality_gate
-    post_content_path = (
-        tmp_path / "output" / run_id / "artifacts" / "post_content_summary.json"
-    )
+    post_content_path = quality_gate_artifacts / "post_content_summary.json"
     assert post_content_path.exists(), (
         "post_content_summary.json should be created by auto-invocation "
         "of post_templates after quality_gate completes"
     )
-    post_summary = json.loads(post_content_path.read_text(encoding="utf-8"))
+    post_summary = load_json(post_content_path.read_bytes())
     assert post_summary["schema_version"] == "v1"
     assert post_summary["run_id"] == run_id
 
 
-def test_orchestrator_quality_gate_missing_mp4_fails(tmp_path, monkeypatch):
-    run_id = "run_missing"
-    output_mp4_rel = f"output/{run_id}/artifacts/missing.mp4"
-    _write_video_render_summary(tmp_path, run_id, output_mp4_rel)
-    write_post_templates(tmp_path)
-    write_metadata(
-        tmp_path,
-        run_id,
-        title="Missing MP4",
-        description="Test missing mp4 behavior",
-        tags=["#missing", "#mp4"],
-    )
-
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: quality_gate_missing
-steps:
-  - id: quality_gate
-    uses: quality.gate
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    mock_run = Mock()
-    monkeypatch.setattr(orchestrator.subprocess, "run", mock_run)
+@pytest.mark.parametrize(
+    ("mp4_bytes", "expected_code"),
+    [
+        pytest.param(None, "mp4_missing", id="missing_mp4"),
+        pytest.param(
+            b"fake mp4",
+            "ffprobe_failed",
+            marks=pytest.mark.ffprobe(1, b""),
+            id="ffprobe_failure",
+        ),
+        pytest.param(b"", "mp4_empty", id="mp4_empty"),
+        pytest.param(
+            b"fake mp4",
+            "duration_zero_or_missing",
+            marks=pytest.mark.ffprobe(0, _PAYLOAD_DURATION_ZERO),
+            id="duration_zero",
+        ),
+        pytest.param(
+            b"fake mp4",
+            "audio_stream_missing",
+            marks=pytest.mark.ffprobe(0, _PAYLOAD_NO_AUDIO),
+            id="audio_stream_missing",
+        ),
+    ],
+)
+def test_orchestrator_quality_gate_fails(
+    tmp_path,
+    quality_gate_artifacts,
+    pipeline_specs,
+    ffprobe_stub,
+    mp4_bytes,
+    expected_code,
+):
+    """
+    ทดสอบกรณีที่ quality gate ต้อง fail พร้อมเหตุผลที่ถูกต้อง
+    และต้องไม่เรียก post_templates อัตโนมัติ
+    """
+    run_id = _QG_RUN_ID
+    output_mp4_rel = _QG_MP4_REL
+    artifacts_dir = quality_gate_artifacts
+    if mp4_bytes is not None:
+        write_bytes(tmp_path / output_mp4_rel, mp4_bytes)
 
-    try:
-        orchestrator.run_pipeline(pipeline_path, run_id)
-    except RuntimeError as exc:
-        assert "Quality gate failed" in str(exc)
-        assert run_id in str(exc)
-    else:
-        raise AssertionError("Expected RuntimeError for missing mp4")
+    with pytest.raises(RuntimeError, match="Quality gate failed") as exc_info:
+        orchestrator.run_pipeline_spec(pipeline_specs["quality_gate"], run_id)
+    assert run_id in str(exc_info.value)
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "quality_gate_summary.json"
-    )
+    summary_path = artifacts_dir / "quality_gate_summary.json"
     assert summary_path.exists()
 
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = load_json(summary_path.read_bytes())
     _assert_summary_contract(summary, run_id, output_mp4_rel)
     assert summary["decision"] == "fail"
-    assert [reason["code"] for reason in summary["reasons"]] == ["mp4_missing"]
+    assert [reason["code"] for reason in summary["reasons"]] == [expected_code]
     _assert_reason_contract(summary["reasons"][0], summary["checked_at"])
-    assert mock_run.call_count == 0
+    # ffprobe ต้องถูกเรียกเฉพาะเมื่อมีไฟล์ mp4 ที่ไม่ว่าง
+    assert ffprobe_stub.ffprobe_calls == (1 if mp4_bytes else 0)
 
     # Verify post_templates was NOT auto-invoked when quality_gate fails
-    post_content_path = (
-        tmp_path / "output" / run_id / "artifacts" / "post_content_summary.json"
-    )
+    post_content_path = artifacts_dir / "post_content_summary.json"
     assert not post_content_path.exists(), (
         "post_content_summary.json should NOT be created when quality_gate fails"
     )
 
 
-def test_orchestrator_quality_gate_ffprobe_failure(tmp_path, monkeypatch):
-    run_id = "run_ffprobe"
-    output_mp4_rel = f"output/{run_id}/artifacts/demo_fail.mp4"
-    mp4_path = tmp_path / output_mp4_rel
-    mp4_path.parent.mkdir(parents=True, exist_ok=True)
-    mp4_path.write_bytes(b"fake mp4")
+def test_orchestrator_quality_gate_reprobes_rerendered_mp4(
+    tmp_path, quality_gate_artifacts, pipeline_specs, ffprobe_stub
+):
+    """mp4 ที่ถูก render ใหม่ (ขนาดและ mtime เดิม) ต้องถูก ffprobe ใหม่ทุกครั้ง"""
+    mp4_path = tmp_path / _QG_MP4_REL
+    write_bytes(mp4_path, b"fake mp4")
+    original = mp4_path.stat()
 
-    _write_video_render_summary(tmp_path, run_id, output_mp4_rel)
+    orchestrator.run_pipeline_spec(pipeline_specs["quality_gate"], _QG_RUN_ID)
+    assert ffprobe_stub.ffprobe_calls == 1
 
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: quality_gate_ffprobe
-steps:
-  - id: quality_gate
-    uses: quality.gate
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    def fake_run(cmd, check=False, capture_output=True, text=True):
-        return subprocess.CompletedProcess(cmd, 1, stdout="", stderr="error")
+    write_bytes(mp4_path, b"fake mp5")
+    os.utime(mp4_path, ns=(original.st_atime_ns, original.st_mtime_ns))
+    orchestrator.run_pipeline_spec(pipeline_specs["quality_gate"], _QG_RUN_ID)
+    assert ffprobe_stub.ffprobe_calls == 2
 
-    monkeypatch.setattr(orchestrator.subprocess, "run", fake_run)
 
-    try:
-        orchestrator.run_pipeline(pipeline_path, run_id)
-    except RuntimeError as exc:
-        assert "Quality gate failed" in str(exc)
-    else:
-        raise AssertionError("Expected RuntimeError for ffprobe failure")
-
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "quality_gate_summary.json"
-    )
-    assert summary_path.exists()
-
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
-    _assert_summary_contract(summary, run_id, output_mp4_rel)
-    assert summary["decision"] == "fail"
-    assert [reason["code"] for reason in summary["reasons"]] == ["ffprobe_failed"]
-    _assert_reason_contract(summary["reasons"][0], summary["checked_at"])
-
-
-def test_orchestrator_quality_gate_mp4_empty_fails(tmp_path, monkeypatch):
-    run_id = "run_empty"
-    output_mp4_rel = f"output/{run_id}/artifacts/empty.mp4"
-    mp4_path = tmp_path / output_mp4_rel
-    mp4_path.parent.mkdir(parents=True, exist_ok=True)
-    mp4_path.write_bytes(b"")
-
-    _write_video_render_summary(tmp_path, run_id, output_mp4_rel)
-
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: quality_gate_empty
-steps:
-  - id: quality_gate
-    uses: quality.gate
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    mock_run = Mock()
-    monkeypatch.setattr(orchestrator.subprocess, "run", mock_run)
-
-    try:
-        orchestrator.run_pipeline(pipeline_path, run_id)
-    except RuntimeError as exc:
-        assert "Quality gate failed" in str(exc)
-    else:
-        raise AssertionError("Expected RuntimeError for empty mp4")
-
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "quality_gate_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
-    _assert_summary_contract(summary, run_id, output_mp4_rel)
-    assert summary["decision"] == "fail"
-    assert [reason["code"] for reason in summary["reasons"]] == ["mp4_empty"]
-    _assert_reason_contract(summary["reasons"][0], summary["checked_at"])
-    assert mock_run.call_count == 0
-
-
-def test_orchestrator_quality_gate_duration_zero_fails(tmp_path, monkeypatch):
-    run_id = "run_dur_zero"
-    output_mp4_rel = f"output/{run_id}/artifacts/dur_zero.mp4"
-    mp4_path = tmp_path / output_mp4_rel
-    mp4_path.parent.mkdir(parents=True, exist_ok=True)
-    mp4_path.write_bytes(b"fake mp4")
-
-    _write_video_render_summary(tmp_path, run_id, output_mp4_rel)
-
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: quality_gate_dur_zero
-steps:
-  - id: quality_gate
-    uses: quality.gate
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    ffprobe_payload = json.dumps(
-        {"format": {"duration": "0"}, "streams": [{"codec_type": "audio"}]}
-    )
-
-    def fake_run(cmd, check=False, capture_output=True, text=True):
-        return subprocess.CompletedProcess(cmd, 0, stdout=ffprobe_payload, stderr="")
-
-    monkeypatch.setattr(orchestrator.subprocess, "run", fake_run)
-
-    try:
-        orchestrator.run_pipeline(pipeline_path, run_id)
-    except RuntimeError as exc:
-        assert "Quality gate failed" in str(exc)
-    else:
-        raise AssertionError("Expected RuntimeError for duration zero")
-
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "quality_gate_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
-    _assert_summary_contract(summary, run_id, output_mp4_rel)
-    assert summary["decision"] == "fail"
-    assert [reason["code"] for reason in summary["reasons"]] == [
-        "duration_zero_or_missing"
-    ]
-    _assert_reason_contract(summary["reasons"][0], summary["checked_at"])
-
-
-def test_orchestrator_quality_gate_audio_stream_missing_fails(tmp_path, monkeypatch):
-    run_id = "run_no_audio"
-    output_mp4_rel = f"output/{run_id}/artifacts/no_audio.mp4"
-    mp4_path = tmp_path / output_mp4_rel
-    mp4_path.parent.mkdir(parents=True, exist_ok=True)
-    mp4_path.write_bytes(b"fake mp4")
-
-    _write_video_render_summary(tmp_path, run_id, output_mp4_rel)
-
-    pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: quality_gate_no_audio
-steps:
-  - id: quality_gate
-    uses: quality.gate
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    ffprobe_payload = json.dumps(
-        {"format": {"duration": "12.0"}, "streams": [{"codec_type": "video"}]}
-    )
-
-    def fake_run(cmd, check=False, capture_output=True, text=True):
-        return subprocess.CompletedProcess(cmd, 0, stdout=ffprobe_payload, stderr="")
-
-    monkeypatch.setattr(orchestrator.subprocess, "run", fake_run)
-
-    try:
-        orchestrator.run_pipeline(pipeline_path, run_id)
-    except RuntimeError as exc:
-        assert "Quality gate failed" in str(exc)
-    else:
-        raise AssertionError("Expected RuntimeError for missing audio stream")
-
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "quality_gate_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
-    _assert_summary_contract(summary, run_id, output_mp4_rel)
-    assert summary["decision"] == "fail"
-    assert [reason["code"] for reason in summary["reasons"]] == ["audio_stream_missing"]
-    _assert_reason_contract(summary["reasons"][0], summary["checked_at"])
-
-
-def test_orchestrator_both_video_render_and_quality_gate(tmp_path, monkeypatch):
+def test_orchestrator_both_video_render_and_quality_gate(tmp_path, post_templates):
     """
     ทดสอบว่า post_templates ถูกเรียกครั้งเดียวหลัง quality.gate
     เมื่อมีทั้ง video.render และ quality.gate
@@ -370,13 +283,11 @@ def test_orchestrator_both_video_render_and_quality_gate(tmp_path, monkeypatch):
     sha12 = compute_input_sha256("Hello both steps")[:12]
 
     # Setup voiceover summary for video.render
-    artifacts_dir = tmp_path / "output" / run_id / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    artifacts_dir = prepare_run_dirs(tmp_path, run_id, voiceovers=True)
 
     wav_rel = f"data/voiceovers/{run_id}/{slug}_{sha12}.wav"
     wav_path = tmp_path / wav_rel
-    wav_path.parent.mkdir(parents=True, exist_ok=True)
-    wav_path.write_bytes(b"RIFF")
+    write_bytes(wav_path, b"RIFF")
 
     voiceover_summary = {
         "schema_version": "v1",
@@ -388,12 +299,12 @@ def test_orchestrator_both_video_render_and_quality_gate(tmp_path, monkeypatch):
         "engine": "null_tts",
     }
     voiceover_summary_path = artifacts_dir / "voiceover_summary.json"
-    voiceover_summary_path.write_text(
-        json.dumps(voiceover_summary, indent=2), encoding="utf-8"
+    write_bytes(
+        voiceover_summary_path,
+        dump_json(voiceover_summary),
     )
 
     # Setup templates and metadata
-    write_post_templates(tmp_path)
     write_metadata(
         tmp_path,
         run_id,
@@ -403,40 +314,11 @@ def test_orchestrator_both_video_render_and_quality_gate(tmp_path, monkeypatch):
     )
 
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: both_steps
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: {slug}
-      dry_run: false
-  - id: quality_gate
-    uses: quality.gate
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
+    write_bytes(pipeline_path, _PIPELINE_BOTH_STEPS)
 
     output_mp4_rel = f"output/{run_id}/artifacts/{slug}_{sha12}.mp4"
     mp4_path = tmp_path / output_mp4_rel
-    mp4_path.write_bytes(b"fake mp4 data")
-
-    ffprobe_payload = json.dumps(
-        {"format": {"duration": "12.0"}, "streams": [{"codec_type": "audio"}]}
-    )
-
-    def fake_run(cmd, check=False, capture_output=True, text=True):
-        if "ffprobe" in str(cmd):
-            return subprocess.CompletedProcess(
-                cmd, 0, stdout=ffprobe_payload, stderr=""
-            )
-        else:  # ffmpeg
-            return subprocess.CompletedProcess(cmd, 0, stdout="ok", stderr="")
-
-    monkeypatch.setattr(orchestrator.subprocess, "run", fake_run)
+    write_bytes(mp4_path, b"fake mp4 data")
 
     orchestrator.run_pipeline(pipeline_path, run_id)
 
@@ -455,7 +337,7 @@ steps:
         "after quality_gate completes (not after video_render)"
     )
 
-    post_summary = json.loads(post_content_path.read_text(encoding="utf-8"))
+    post_summary = load_json(post_content_path.read_bytes())
     assert post_summary["schema_version"] == "v1"
     assert post_summary["run_id"] == run_id
 
@@ -466,7 +348,9 @@ steps:
     assert f"output/{run_id}/metadata.json" in sources
 
 
-def test_orchestrator_explicit_post_templates_no_autorun(tmp_path, monkeypatch):
+def test_orchestrator_explicit_post_templates_no_autorun(
+    tmp_path, monkeypatch, post_templates
+):
     """
     ทดสอบว่าเมื่อมี step post_templates ระบุไว้แล้วจะไม่ auto-run ซ้ำ
     """
@@ -476,13 +360,11 @@ def test_orchestrator_explicit_post_templates_no_autorun(tmp_path, monkeypatch):
     slug = "explicitpost"
     sha12 = compute_input_sha256("Hello explicit post")[:12]
 
-    artifacts_dir = tmp_path / "output" / run_id / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    artifacts_dir = prepare_run_dirs(tmp_path, run_id, voiceovers=True)
 
     wav_rel = f"data/voiceovers/{run_id}/{slug}_{sha12}.wav"
     wav_path = tmp_path / wav_rel
-    wav_path.parent.mkdir(parents=True, exist_ok=True)
-    wav_path.write_bytes(b"RIFF")
+    write_bytes(wav_path, b"RIFF")
 
     voiceover_summary = {
         "schema_version": "v1",
@@ -494,11 +376,11 @@ def test_orchestrator_explicit_post_templates_no_autorun(tmp_path, monkeypatch):
         "engine": "null_tts",
     }
     voiceover_summary_path = artifacts_dir / "voiceover_summary.json"
-    voiceover_summary_path.write_text(
-        json.dumps(voiceover_summary, indent=2), encoding="utf-8"
+    write_bytes(
+        voiceover_summary_path,
+        dump_json(voiceover_summary),
     )
 
-    write_post_templates(tmp_path)
     write_metadata(
         tmp_path,
         run_id,
@@ -508,42 +390,11 @@ def test_orchestrator_explicit_post_templates_no_autorun(tmp_path, monkeypatch):
     )
 
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: explicit_post_templates
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: {slug}
-      dry_run: false
-  - id: quality_gate
-    uses: quality.gate
-  - id: post_templates
-    uses: post_templates
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
+    write_bytes(pipeline_path, _PIPELINE_EXPLICIT_POST_TEMPLATES)
 
     output_mp4_rel = f"output/{run_id}/artifacts/{slug}_{sha12}.mp4"
     mp4_path = tmp_path / output_mp4_rel
-    mp4_path.parent.mkdir(parents=True, exist_ok=True)
-    mp4_path.write_bytes(b"fake mp4 data")
-
-    ffprobe_payload = json.dumps(
-        {"format": {"duration": "12.0"}, "streams": [{"codec_type": "audio"}]}
-    )
-
-    def fake_run(cmd, check=False, capture_output=True, text=True):
-        if "ffprobe" in str(cmd):
-            return subprocess.CompletedProcess(
-                cmd, 0, stdout=ffprobe_payload, stderr=""
-            )
-        return subprocess.CompletedProcess(cmd, 0, stdout="ok", stderr="")
-
-    monkeypatch.setattr(orchestrator.subprocess, "run", fake_run)
+    write_bytes(mp4_path, b"fake mp4 data")
 
     calls: list[str] = []
     original = orchestrator._run_post_templates_step
@@ -560,6 +411,6 @@ steps:
 
     post_content_path = artifacts_dir / "post_content_summary.json"
     assert post_content_path.exists()
-    post_summary = json.loads(post_content_path.read_text(encoding="utf-8"))
+    post_summary = load_json(post_content_path.read_bytes())
     assert post_summary["schema_version"] == "v1"
     assert post_summary["run_id"] == run_id
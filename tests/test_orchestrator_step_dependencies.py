@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+import orchestrator
+
+pytestmark = pytest.mark.usefixtures("orchestrator_env")
+
+
+def test_steps_with_empty_depends_on_run_concurrently(monkeypatch):
+    """step ที่ depends_on: [] ต้องเริ่มพร้อมกันได้ และ step ที่ขึ้นกับทั้งคู่รันทีหลัง"""
+    barrier = threading.Barrier(2, timeout=5)
+    order: list[str] = []
+
+    def fake_parallel(step, run_dir: Path) -> str:
+        # ถ้ารันทีละ step barrier จะ timeout และเทสจะล้มเหลว
+        barrier.wait()
+        order.append(step["id"])
+        return step["id"]
+
+    def fake_join(step, run_dir: Path) -> str:
+        order.append(step["id"])
+        return step["id"]
+
+    monkeypatch.setitem(orchestrator.AGENTS, "test.parallel", fake_parallel)
+    monkeypatch.setitem(orchestrator.AGENTS, "test.join", fake_join)
+    monkeypatch.setattr(orchestrator.os, "cpu_count", lambda: 2)
+
+    summary = orchestrator.run_pipeline_spec(
+        {
+            "pipeline": "parallel_steps",
+            "steps": [
+                {"id": "left", "uses": "test.parallel", "depends_on": []},
+                {"id": "right", "uses": "test.parallel", "depends_on": []},
+                {"id": "join", "uses": "test.join", "depends_on": ["left", "right"]},
+            ],
+        },
+        "run_parallel",
+    )
+
+    assert sorted(order[:2]) == ["left", "right"]
+    assert order[2] == "join"
+    assert list(summary["results"]) == ["left", "right", "join"]
+    assert summary["successful"] == 3
+
+
+def test_step_without_depends_on_waits_for_previous_step(monkeypatch):
+    order: list[str] = []
+
+    def fake_agent(step, run_dir: Path) -> str:
+        order.append(step["id"])
+        return step["id"]
+
+    monkeypatch.setitem(orchestrator.AGENTS, "test.agent", fake_agent)
+
+    orchestrator.run_pipeline_spec(
+        {
+            "pipeline": "implicit_order",
+            "steps": [
+                {"id": "first", "uses": "test.agent", "depends_on": []},
+                {"id": "second", "uses": "test.agent"},
+                {"id": "third", "uses": "test.agent"},
+            ],
+        },
+        "run_implicit",
+    )
+
+    assert order == ["first", "second", "third"]
+
+
+def test_unknown_step_dependency_raises(tmp_path):
+    with pytest.raises(RuntimeError, match="depends on unknown step"):
+        orchestrator.run_pipeline_spec(
+            {
+                "pipeline": "bad_deps",
+                "steps": [
+                    {"id": "only", "uses": "quality.gate", "depends_on": ["missing"]}
+                ],
+            },
+            "run_bad_deps",
+        )
+    assert not (tmp_path / "output" / "run_bad_deps").exists()
+
+
+def test_duplicate_step_ids_with_depends_on_raise(tmp_path, monkeypatch):
+    """id ซ้ำในโหมด depends_on ต้อง raise ก่อนรัน step ใด ๆ (ไม่รวมเป็น step เดียวเงียบ ๆ)"""
+    calls: list[str] = []
+
+    def fake_agent(step, run_dir: Path) -> str:
+        calls.append(step["id"])
+        return step["id"]
+
+    monkeypatch.setitem(orchestrator.AGENTS, "test.agent", fake_agent)
+
+    with pytest.raises(RuntimeError, match=r"Duplicate step id\(s\): \['twice'\]"):
+        orchestrator.run_pipeline_spec(
+            {
+                "pipeline": "duplicate_ids",
+                "steps": [
+                    {"id": "twice", "uses": "test.agent", "depends_on": []},
+                    {"id": "twice", "uses": "test.agent"},
+                ],
+            },
+            "run_duplicate_ids",
+        )
+    assert calls == []
+    assert not (tmp_path / "output" / "run_duplicate_ids").exists()
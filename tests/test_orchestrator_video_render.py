@@ -1,32 +1,93 @@
 from __future__ import annotations
 
-import json
-import subprocess
-import sys
+import os
 from pathlib import Path
-from unittest.mock import Mock
 
-from automation_core.voiceover_tts import compute_input_sha256
-from tests.helpers import write_metadata, write_post_templates
+import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
 import orchestrator
-
-
-def _snapshot_paths(root: Path) -> list[str]:
-    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*"))
+from automation_core.voiceover_tts import compute_input_sha256
+from tests.helpers import (
+    FFMPEG_OK,
+    CountingStub,
+    dump_json,
+    load_json,
+    prepare_run_dirs,
+    snapshot_paths,
+    write_bytes,
+    write_metadata,
+)
+
+pytestmark = pytest.mark.usefixtures("orchestrator_env")
+
+# pipeline YAML ที่ใช้ในเทส (template ที่มี {slug} จะ format เฉพาะ slug)
+_PIPELINE_VIDEO_RENDER_KILL_SWITCH = b"""pipeline: video_render_kill_switch
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: demo
+      dry_run: false
+"""
+_PIPELINE_VIDEO_RENDER_DRY_RUN = """pipeline: video_render_dry_run
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: {slug}
+      dry_run: true
+"""
+_PIPELINE_VIDEO_RENDER_REAL_RUN = """pipeline: video_render_real_run
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: {slug}
+      dry_run: false
+"""
+_PIPELINE_VIDEO_RENDER_TRAVERSAL = b"""pipeline: video_render_traversal
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: traversal
+      voiceover_summary_path: ../secrets.json
+"""
+_PIPELINE_VIDEO_RENDER_IMAGE_TRAVERSAL = b"""pipeline: video_render_image_traversal
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: traversal
+      image_path: ../image.png
+"""
+_PIPELINE_VIDEO_RENDER_MISSING_SUMMARY = b"""pipeline: video_render_missing_summary
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: demo
+      dry_run: true
+"""
+_PIPELINE_VIDEO_RENDER_MISSING_IMAGE = """pipeline: video_render_missing_image
+steps:
+  - id: video_render
+    uses: video.render
+    config:
+      slug: {slug}
+      image_path: thumbnails/does_not_exist.png
+      dry_run: true
+"""
 
 
 def _write_voiceover_summary(
     root: Path, run_id: str, slug: str, sha12: str
 ) -> tuple[Path, str]:
-    artifacts_dir = root / "output" / run_id / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    # สร้างทั้ง output/<run_id>/artifacts และ data/voiceovers/<run_id> ด้วย os.makedirs
+    artifacts_dir = prepare_run_dirs(root, run_id, voiceovers=True)
 
     wav_rel = f"data/voiceovers/{run_id}/{slug}_{sha12}.wav"
-    wav_path = root / wav_rel
-    wav_path.parent.mkdir(parents=True, exist_ok=True)
-    wav_path.write_bytes(b"RIFF")
+    write_bytes(root / wav_rel, b"RIFF")
 
     summary = {
         "schema_version": "v1",
@@ -38,7 +99,7 @@ def _write_voiceover_summary(
         "engine": "null_tts",
     }
     summary_path = artifacts_dir / "voiceover_summary.json"
-    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    write_bytes(summary_path, dump_json(summary))
     return summary_path, wav_rel
 
 
@@ -46,21 +107,10 @@ def test_orchestrator_video_render_kill_switch_no_side_effects(
     tmp_path, monkeypatch, capsys
 ):
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: video_render_kill_switch
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: demo
-      dry_run: false
-""",
-        encoding="utf-8",
-    )
+    write_bytes(pipeline_path, _PIPELINE_VIDEO_RENDER_KILL_SWITCH)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
     monkeypatch.setenv("PIPELINE_ENABLED", "false")
-    mock_run = Mock()
+    mock_run = CountingStub(FFMPEG_OK)
     monkeypatch.setattr(orchestrator.subprocess, "run", mock_run)
     monkeypatch.setattr(
         "sys.argv",
@@ -73,9 +123,9 @@ steps:
         ],
     )
 
-    before = _snapshot_paths(tmp_path)
+    before = snapshot_paths(tmp_path)
     exit_code = orchestrator.main()
-    after = _snapshot_paths(tmp_path)
+    after = snapshot_paths(tmp_path)
 
     assert exit_code == 0
     assert before == after
@@ -94,26 +144,16 @@ def test_orchestrator_video_render_dry_run_no_writes(tmp_path, monkeypatch):
     _, wav_rel = _write_voiceover_summary(tmp_path, run_id, slug, sha12)
 
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: video_render_dry_run
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: {slug}
-      dry_run: true
-""",
-        encoding="utf-8",
+    write_bytes(
+        pipeline_path, _PIPELINE_VIDEO_RENDER_DRY_RUN.format(slug=slug).encode()
     )
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    mock_run = Mock()
+    mock_run = CountingStub(FFMPEG_OK)
     monkeypatch.setattr(orchestrator.subprocess, "run", mock_run)
 
-    before = _snapshot_paths(tmp_path)
+    before = snapshot_paths(tmp_path)
     summary = orchestrator.run_pipeline(pipeline_path, run_id)
-    after = _snapshot_paths(tmp_path)
+    after = snapshot_paths(tmp_path)
 
     assert before == after
     assert mock_run.call_count == 0
@@ -126,7 +166,7 @@ steps:
         "input_voiceover_summary",
         "input_wav_path",
     ):
-        assert not Path(planned[key]).is_absolute()
+        assert not os.path.isabs(planned[key])
 
     assert (
         planned["summary_path"]
@@ -140,12 +180,13 @@ steps:
     assert planned["output_mp4_path"] == f"output/{run_id}/artifacts/{slug}_{sha12}.mp4"
 
 
-def test_orchestrator_video_render_real_run_writes_summary(tmp_path, monkeypatch):
+def test_orchestrator_video_render_real_run_writes_summary(
+    tmp_path, monkeypatch, post_templates
+):
     run_id = "run_real"
     slug = "realrender"
     sha12 = compute_input_sha256("Hello real run")[:12]
     _, wav_rel = _write_voiceover_summary(tmp_path, run_id, slug, sha12)
-    write_post_templates(tmp_path)
     write_metadata(
         tmp_path,
         run_id,
@@ -155,34 +196,22 @@ def test_orchestrator_video_render_real_run_writes_summary(tmp_path, monkeypatch
     )
 
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: video_render_real_run
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: {slug}
-      dry_run: false
-""",
-        encoding="utf-8",
+    write_bytes(
+        pipeline_path, _PIPELINE_VIDEO_RENDER_REAL_RUN.format(slug=slug).encode()
     )
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    def fake_run(cmd, check, capture_output, text):
-        return subprocess.CompletedProcess(cmd, 0, stdout="ok", stderr="")
-
+    fake_run = CountingStub(FFMPEG_OK)
     monkeypatch.setattr(orchestrator.subprocess, "run", fake_run)
 
     orchestrator.run_pipeline(pipeline_path, run_id)
+    assert fake_run.call_count == 1
 
     summary_path = (
         tmp_path / "output" / run_id / "artifacts" / "video_render_summary.json"
     )
     assert summary_path.exists()
 
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = load_json(summary_path.read_bytes())
     assert summary["schema_version"] == "v1"
     assert summary["run_id"] == run_id
     assert summary["slug"] == slug
@@ -197,9 +226,9 @@ steps:
     assert isinstance(summary["ffmpeg_cmd"], list)
 
     for key in ("input_voiceover_summary", "input_wav_path", "output_mp4_path"):
-        assert not Path(summary[key]).is_absolute()
+        assert not os.path.isabs(summary[key])
     for arg in summary["ffmpeg_cmd"]:
-        assert not Path(arg).is_absolute()
+        assert not os.path.isabs(arg)
 
     assert wav_rel in summary["ffmpeg_cmd"]
     assert summary["output_mp4_path"] in summary["ffmpeg_cmd"]
@@ -212,29 +241,14 @@ steps:
         "post_content_summary.json should be created by auto-invocation "
         "of post_templates after video_render completes"
     )
-    post_summary = json.loads(post_content_path.read_text(encoding="utf-8"))
+    post_summary = load_json(post_content_path.read_bytes())
     assert post_summary["schema_version"] == "v1"
     assert post_summary["run_id"] == run_id
 
 
-def test_orchestrator_video_render_voiceover_summary_traversal_blocked(
-    tmp_path, monkeypatch
-):
+def test_orchestrator_video_render_voiceover_summary_traversal_blocked(tmp_path):
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: video_render_traversal
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: traversal
-      voiceover_summary_path: ../secrets.json
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
+    write_bytes(pipeline_path, _PIPELINE_VIDEO_RENDER_TRAVERSAL)
 
     try:
         orchestrator.run_pipeline(pipeline_path, "run_traversal")
@@ -244,22 +258,9 @@ steps:
         raise AssertionError("Expected ValueError for voiceover_summary_path traversal")
 
 
-def test_orchestrator_video_render_image_path_traversal_blocked(tmp_path, monkeypatch):
+def test_orchestrator_video_render_image_path_traversal_blocked(tmp_path):
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: video_render_image_traversal
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: traversal
-      image_path: ../image.png
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
+    write_bytes(pipeline_path, _PIPELINE_VIDEO_RENDER_IMAGE_TRAVERSAL)
 
     try:
         orchestrator.run_pipeline(pipeline_path, "run_traversal")
@@ -269,24 +270,9 @@ steps:
         raise AssertionError("Expected ValueError for image_path traversal")
 
 
-def test_orchestrator_video_render_missing_voiceover_summary_has_clear_error(
-    tmp_path, monkeypatch
-):
+def test_orchestrator_video_render_missing_voiceover_summary_has_clear_error(tmp_path):
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: video_render_missing_summary
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: demo
-      dry_run: true
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
+    write_bytes(pipeline_path, _PIPELINE_VIDEO_RENDER_MISSING_SUMMARY)
 
     try:
         orchestrator.run_pipeline(pipeline_path, "run_missing")
@@ -297,29 +283,17 @@ steps:
         raise AssertionError("Expected FileNotFoundError for missing voiceover summary")
 
 
-def test_orchestrator_video_render_missing_image_has_clear_error(tmp_path, monkeypatch):
+def test_orchestrator_video_render_missing_image_has_clear_error(tmp_path):
     run_id = "run_img_missing"
     slug = "imgmissing"
     sha12 = compute_input_sha256("Hello image missing")[:12]
     _write_voiceover_summary(tmp_path, run_id, slug, sha12)
 
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: video_render_missing_image
-steps:
-  - id: video_render
-    uses: video.render
-    config:
-      slug: {slug}
-      image_path: thumbnails/does_not_exist.png
-      dry_run: true
-""",
-        encoding="utf-8",
+    write_bytes(
+        pipeline_path, _PIPELINE_VIDEO_RENDER_MISSING_IMAGE.format(slug=slug).encode()
     )
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
     try:
         orchestrator.run_pipeline(pipeline_path, run_id)
     except FileNotFoundError as exc:
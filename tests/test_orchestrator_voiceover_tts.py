@@ -1,17 +1,50 @@
 from __future__ import annotations
 
-import json
-import sys
-from pathlib import Path
+import os
 
-from automation_core.voiceover_tts import compute_input_sha256
+import pytest
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
 import orchestrator
+from automation_core.voiceover_tts import compute_input_sha256
+from tests.helpers import load_json, snapshot_paths, write_bytes
 
+pytestmark = pytest.mark.usefixtures("orchestrator_env")
 
-def _snapshot_paths(root: Path) -> list[str]:
-    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*"))
+# pipeline YAML ที่ใช้ในเทส (template ที่มี {slug} จะ format เฉพาะ slug)
+_PIPELINE_VOICEOVER_TTS_KILL_SWITCH = """pipeline: voiceover_tts_kill_switch
+steps:
+  - id: voiceover_step
+    uses: voiceover.tts
+    config:
+      slug: {slug}
+      script_path: scripts/voiceover.txt
+      dry_run: false
+"""
+_PIPELINE_VOICEOVER_TTS_DRY_RUN = """pipeline: voiceover_tts_dry_run
+steps:
+  - id: voiceover_step
+    uses: voiceover.tts
+    config:
+      slug: {slug}
+      script_path: scripts/voiceover.txt
+      dry_run: true
+"""
+_PIPELINE_VOICEOVER_TTS_REAL_RUN = """pipeline: voiceover_tts_real_run
+steps:
+  - id: voiceover_step
+    uses: voiceover.tts
+    config:
+      slug: {slug}
+      script_path: scripts/voiceover.txt
+"""
+_PIPELINE_VOICEOVER_TTS_TRAVERSAL = b"""pipeline: voiceover_tts_traversal
+steps:
+  - id: voiceover_step
+    uses: voiceover.tts
+    config:
+      slug: traversal
+      script_path: ../secrets.txt
+"""
 
 
 def test_orchestrator_voiceover_tts_kill_switch_no_side_effects(
@@ -20,22 +53,12 @@ def test_orchestrator_voiceover_tts_kill_switch_no_side_effects(
     slug = "demo"
     script_path = tmp_path / "scripts" / "voiceover.txt"
     script_path.parent.mkdir(parents=True, exist_ok=True)
-    script_path.write_text("Hello world", encoding="utf-8")
+    write_bytes(script_path, b"Hello world")
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: voiceover_tts_kill_switch
-steps:
-  - id: voiceover_step
-    uses: voiceover.tts
-    config:
-      slug: {slug}
-      script_path: scripts/voiceover.txt
-      dry_run: false
-""",
-        encoding="utf-8",
+    write_bytes(
+        pipeline_path, _PIPELINE_VOICEOVER_TTS_KILL_SWITCH.format(slug=slug).encode()
     )
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
     monkeypatch.setenv("PIPELINE_ENABLED", "false")
     monkeypatch.setattr(
         "sys.argv",
@@ -48,9 +71,9 @@ steps:
         ],
     )
 
-    before = _snapshot_paths(tmp_path)
+    before = snapshot_paths(tmp_path)
     exit_code = orchestrator.main()
-    after = _snapshot_paths(tmp_path)
+    after = snapshot_paths(tmp_path)
 
     assert exit_code == 0
     assert before == after
@@ -61,32 +84,20 @@ steps:
     assert "Pipeline disabled by PIPELINE_ENABLED=false" in captured.out
 
 
-def test_orchestrator_voiceover_tts_dry_run_no_writes(tmp_path, monkeypatch):
+def test_orchestrator_voiceover_tts_dry_run_no_writes(tmp_path):
     slug = "dryrun"
     script_text = "Line one\nLine two\n"
     script_path = tmp_path / "scripts" / "voiceover.txt"
     script_path.parent.mkdir(parents=True, exist_ok=True)
-    script_path.write_text(script_text, encoding="utf-8")
+    write_bytes(script_path, script_text.encode("utf-8"))
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: voiceover_tts_dry_run
-steps:
-  - id: voiceover_step
-    uses: voiceover.tts
-    config:
-      slug: {slug}
-      script_path: scripts/voiceover.txt
-      dry_run: true
-""",
-        encoding="utf-8",
+    write_bytes(
+        pipeline_path, _PIPELINE_VOICEOVER_TTS_DRY_RUN.format(slug=slug).encode()
     )
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
-    before = _snapshot_paths(tmp_path)
+    before = snapshot_paths(tmp_path)
     summary = orchestrator.run_pipeline(pipeline_path, "run_dry")
-    after = _snapshot_paths(tmp_path)
+    after = snapshot_paths(tmp_path)
 
     assert before == after
     assert not (tmp_path / "output" / "run_dry").exists()
@@ -95,7 +106,7 @@ steps:
     result = summary["results"]["voiceover_step"]
     planned = result["planned_paths"]
     for key in ("summary_path", "wav_path", "metadata_path"):
-        assert not Path(planned[key]).is_absolute()
+        assert not os.path.isabs(planned[key])
     assert planned["summary_path"] == "output/run_dry/artifacts/voiceover_summary.json"
 
     sha = compute_input_sha256(script_text)
@@ -105,29 +116,18 @@ steps:
     assert planned["metadata_path"].endswith(f"{slug}_{sha[:12]}.json")
 
 
-def test_orchestrator_voiceover_tts_real_run_creates_artifacts(tmp_path, monkeypatch):
+def test_orchestrator_voiceover_tts_real_run_creates_artifacts(tmp_path):
     slug = "realrun"
     script_text = "Hello voiceover\nSecond line\n"
     script_path = tmp_path / "scripts" / "voiceover.txt"
     script_path.parent.mkdir(parents=True, exist_ok=True)
-    script_path.write_text(script_text, encoding="utf-8")
+    write_bytes(script_path, script_text.encode("utf-8"))
 
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        f"""pipeline: voiceover_tts_real_run
-steps:
-  - id: voiceover_step
-    uses: voiceover.tts
-    config:
-      slug: {slug}
-      script_path: scripts/voiceover.txt
-""",
-        encoding="utf-8",
+    write_bytes(
+        pipeline_path, _PIPELINE_VOICEOVER_TTS_REAL_RUN.format(slug=slug).encode()
     )
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-
     orchestrator.run_pipeline(pipeline_path, "run_real")
 
     summary_path = (
@@ -135,7 +135,7 @@ steps:
     )
     assert summary_path.exists()
 
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = load_json(summary_path.read_bytes())
     assert summary["schema_version"] == "v1"
     assert summary["run_id"] == "run_real"
     assert summary["slug"] == slug
@@ -145,7 +145,7 @@ steps:
     assert summary["engine"]
 
     for key in ("wav_path", "metadata_path"):
-        assert not Path(summary[key]).is_absolute()
+        assert not os.path.isabs(summary[key])
 
     sha = compute_input_sha256(script_text)
     assert summary["wav_path"].startswith("data/voiceovers/run_real/")
@@ -159,24 +159,9 @@ steps:
     assert metadata_path.exists()
 
 
-def test_orchestrator_voiceover_tts_script_path_traversal_blocked(
-    tmp_path, monkeypatch
-):
+def test_orchestrator_voiceover_tts_script_path_traversal_blocked(tmp_path):
     pipeline_path = tmp_path / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: voiceover_tts_traversal
-steps:
-  - id: voiceover_step
-    uses: voiceover.tts
-    config:
-      slug: traversal
-      script_path: ../secrets.txt
-""",
-        encoding="utf-8",
-    )
-
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
+    write_bytes(pipeline_path, _PIPELINE_VOICEOVER_TTS_TRAVERSAL)
 
     try:
         orchestrator.run_pipeline(pipeline_path, "run_traversal")
@@ -1,70 +1,120 @@
 from __future__ import annotations
 
-import json
-import sys
+import os
+import shutil
 from pathlib import Path
-from unittest.mock import Mock
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import pytest
+
 import orchestrator
+from tests.helpers import CountingStub, dump_json, load_json, write_bytes
+
+pytestmark = pytest.mark.usefixtures("orchestrator_env")
+
+_PIPELINE_YAML_BYTES = b"""pipeline: youtube_upload_test
+steps:
+  - id: youtube_upload
+    uses: youtube.upload
+"""
+
+_FAKE_MP4_BYTES = b"fake mp4"
+
+
+@pytest.fixture(scope="module")
+def fake_mp4(tmp_path_factory) -> Path:
+    """ไฟล์ mp4 ปลอมไฟล์เดียวต่อโมดูล ให้แต่ละเทส hardlink เข้า artifacts (อ่านอย่างเดียว)"""
+    mp4_path = tmp_path_factory.mktemp("fake_mp4") / "fake.mp4"
+    write_bytes(mp4_path, _FAKE_MP4_BYTES)
+    return mp4_path
+
+
+def _ensure_artifacts(root: Path, run_id: str) -> str:
+    artifacts_dir = os.path.join(root, "output", run_id, "artifacts")
+    os.makedirs(artifacts_dir, exist_ok=True)
+    return artifacts_dir
 
 
 def _write_quality_gate_summary(
-    root: Path, run_id: str, decision: str, output_mp4_rel: str
-) -> Path:
-    artifacts_dir = root / "output" / run_id / "artifacts"
-    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    artifacts_dir: str, run_id: str, decision: str, output_mp4_rel: str
+) -> str:
     summary = {
         "schema_version": "v1",
         "run_id": run_id,
         "output_mp4_path": output_mp4_rel,
         "decision": decision,
     }
-    summary_path = artifacts_dir / "quality_gate_summary.json"
-    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    summary_path = os.path.join(artifacts_dir, "quality_gate_summary.json")
+    write_bytes(summary_path, dump_json(summary))
     return summary_path
 
 
-def _write_mp4(root: Path, output_mp4_rel: str, content: bytes = b"fake mp4") -> Path:
-    mp4_path = root / output_mp4_rel
-    mp4_path.parent.mkdir(parents=True, exist_ok=True)
-    mp4_path.write_bytes(content)
+def _write_mp4(artifacts_dir: str, name: str, source: Path) -> str:
+    mp4_path = os.path.join(artifacts_dir, name)
+    try:
+        os.link(source, mp4_path)
+    except OSError:
+        # filesystem ที่ไม่รองรับ hardlink (หรือข้ามอุปกรณ์) ให้คัดลอกแทน
+        shutil.copyfile(source, mp4_path)
     return mp4_path
 
 
+def _read_upload_summary(root: Path, run_id: str) -> dict:
+    summary_path = os.path.join(
+        root, "output", run_id, "artifacts", "youtube_upload_summary.json"
+    )
+    with open(summary_path, "rb") as fh:
+        return load_json(fh.read())
+
+
+@pytest.fixture
+def youtube_env(monkeypatch, env):
+    """
+    คืนฟังก์ชันตั้งค่า youtube.upload ในครั้งเดียว: env, time.sleep แบบไม่รอ และ upload_video
+    ถ้าไม่ส่ง upload_fn จะใช้ CountingStub และคืน stub ที่ใช้กลับไป
+    """
+
+    def _setup(
+        *,
+        upload_enabled: bool = True,
+        max_retries: str | None = None,
+        upload_fn=None,
+    ):
+        env(
+            {
+                "YOUTUBE_UPLOAD_ENABLED": "true" if upload_enabled else None,
+                "YOUTUBE_UPLOAD_MAX_RETRIES": max_retries,
+            }
+        )
+        monkeypatch.setattr(orchestrator.time, "sleep", lambda _: None)
+        if upload_fn is None:
+            upload_fn = CountingStub()
+        monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", upload_fn)
+        return upload_fn
+
+    return _setup
+
+
 def _write_pipeline(root: Path) -> Path:
     pipeline_path = root / "pipeline.yml"
-    pipeline_path.write_text(
-        """pipeline: youtube_upload_test
-steps:
-  - id: youtube_upload
-    uses: youtube.upload
-""",
-        encoding="utf-8",
-    )
+    write_bytes(pipeline_path, _PIPELINE_YAML_BYTES)
     return pipeline_path
 
 
-def test_orchestrator_youtube_upload_skipped_when_disabled(tmp_path, monkeypatch):
+def test_orchestrator_youtube_upload_skipped_when_disabled(
+    tmp_path, youtube_env, fake_mp4
+):
     run_id = "run_disabled"
     output_mp4_rel = f"output/{run_id}/artifacts/demo.mp4"
-    _write_mp4(tmp_path, output_mp4_rel)
-    _write_quality_gate_summary(tmp_path, run_id, "pass", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_mp4(artifacts_dir, "demo.mp4", fake_mp4)
+    _write_quality_gate_summary(artifacts_dir, run_id, "pass", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.delenv("YOUTUBE_UPLOAD_ENABLED", raising=False)
-
-    mock_upload = Mock()
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", mock_upload)
+    mock_upload = youtube_env(upload_enabled=False)
 
     orchestrator.run_pipeline(pipeline_path, run_id)
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "skipped"
     assert summary["error"]["code"] == "upload_disabled"
     assert summary["attempt_count"] == 0
@@ -72,83 +122,65 @@ def test_orchestrator_youtube_upload_skipped_when_disabled(tmp_path, monkeypatch
 
 
 def test_orchestrator_youtube_upload_skipped_when_disabled_without_quality_summary(
-    tmp_path, monkeypatch
+    tmp_path, youtube_env
 ):
     run_id = "run_disabled_no_quality"
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.delenv("YOUTUBE_UPLOAD_ENABLED", raising=False)
-
-    mock_upload = Mock()
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", mock_upload)
+    mock_upload = youtube_env(upload_enabled=False)
 
     orchestrator.run_pipeline(pipeline_path, run_id)
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "skipped"
     assert summary["error"]["code"] == "upload_disabled"
     assert summary["attempt_count"] == 0
     assert mock_upload.call_count == 0
 
 
-def test_orchestrator_youtube_upload_skipped_when_quality_fail(tmp_path, monkeypatch):
+def test_orchestrator_youtube_upload_skipped_when_quality_fail(
+    tmp_path, youtube_env, fake_mp4
+):
     run_id = "run_quality_fail"
     output_mp4_rel = f"output/{run_id}/artifacts/demo.mp4"
-    _write_mp4(tmp_path, output_mp4_rel)
-    _write_quality_gate_summary(tmp_path, run_id, "fail", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_mp4(artifacts_dir, "demo.mp4", fake_mp4)
+    _write_quality_gate_summary(artifacts_dir, run_id, "fail", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_ENABLED", "true")
-
-    mock_upload = Mock()
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", mock_upload)
+    mock_upload = youtube_env()
 
     orchestrator.run_pipeline(pipeline_path, run_id)
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "skipped"
     assert summary["error"]["code"] == "quality_gate_not_pass"
     assert summary["attempt_count"] == 0
     assert mock_upload.call_count == 0
 
 
-def test_orchestrator_youtube_upload_uploaded_success(tmp_path, monkeypatch):
+def test_orchestrator_youtube_upload_uploaded_success(tmp_path, youtube_env, fake_mp4):
     run_id = "run_success"
     output_mp4_rel = f"output/{run_id}/artifacts/demo.mp4"
-    _write_mp4(tmp_path, output_mp4_rel)
-    _write_quality_gate_summary(tmp_path, run_id, "pass", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_mp4(artifacts_dir, "demo.mp4", fake_mp4)
+    _write_quality_gate_summary(artifacts_dir, run_id, "pass", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_ENABLED", "true")
-
-    mock_upload = Mock(return_value="abc123")
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", mock_upload)
+    youtube_env(upload_fn=CountingStub("abc123"))
 
     orchestrator.run_pipeline(pipeline_path, run_id)
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "uploaded"
     assert summary["video_id"] == "abc123"
     assert summary["video_url"] == "https://www.youtube.com/watch?v=abc123"
     assert summary["attempt_count"] == 1
 
 
-def test_orchestrator_youtube_upload_retry_then_success(tmp_path, monkeypatch):
+def test_orchestrator_youtube_upload_retry_then_success(
+    tmp_path, youtube_env, fake_mp4
+):
     class RetryableError(Exception):
         def __init__(self, status: int):
             super().__init__("retryable")
@@ -156,15 +188,11 @@ def test_orchestrator_youtube_upload_retry_then_success(tmp_path, monkeypatch):
 
     run_id = "run_retry"
     output_mp4_rel = f"output/{run_id}/artifacts/demo.mp4"
-    _write_mp4(tmp_path, output_mp4_rel)
-    _write_quality_gate_summary(tmp_path, run_id, "pass", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_mp4(artifacts_dir, "demo.mp4", fake_mp4)
+    _write_quality_gate_summary(artifacts_dir, run_id, "pass", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_ENABLED", "true")
-    monkeypatch.setattr(orchestrator.time, "sleep", lambda _: None)
-
     calls = {"count": 0}
 
     def fake_upload(*_args, **_kwargs):
@@ -173,19 +201,18 @@ def test_orchestrator_youtube_upload_retry_then_success(tmp_path, monkeypatch):
             raise RetryableError(status=429)
         return "abc123"
 
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", fake_upload)
+    youtube_env(upload_fn=fake_upload)
 
     orchestrator.run_pipeline(pipeline_path, run_id)
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "uploaded"
     assert summary["attempt_count"] == 2
 
 
-def test_orchestrator_youtube_upload_failed_after_retries(tmp_path, monkeypatch):
+def test_orchestrator_youtube_upload_failed_after_retries(
+    tmp_path, youtube_env, fake_mp4
+):
     class RetryableError(Exception):
         def __init__(self, status: int):
             super().__init__("retryable")
@@ -193,20 +220,15 @@ def test_orchestrator_youtube_upload_failed_after_retries(tmp_path, monkeypatch)
 
     run_id = "run_failed"
     output_mp4_rel = f"output/{run_id}/artifacts/demo.mp4"
-    _write_mp4(tmp_path, output_mp4_rel)
-    _write_quality_gate_summary(tmp_path, run_id, "pass", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_mp4(artifacts_dir, "demo.mp4", fake_mp4)
+    _write_quality_gate_summary(artifacts_dir, run_id, "pass", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_MAX_RETRIES", "2")
-    monkeypatch.setattr(orchestrator.time, "sleep", lambda _: None)
-
     def fake_upload(*_args, **_kwargs):
         raise RetryableError(status=503)
 
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", fake_upload)
+    youtube_env(max_retries="2", upload_fn=fake_upload)
 
     try:
         orchestrator.run_pipeline(pipeline_path, run_id)
@@ -216,30 +238,26 @@ def test_orchestrator_youtube_upload_failed_after_retries(tmp_path, monkeypatch)
     else:
         raise AssertionError("Expected RuntimeError for upload retries exhaustion")
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "failed"
     assert summary["error"]["code"] == "upload_failed_after_retries"
     assert summary["attempt_count"] == 3
 
 
-def test_orchestrator_youtube_upload_failed_when_deps_missing(tmp_path, monkeypatch):
+def test_orchestrator_youtube_upload_failed_when_deps_missing(
+    tmp_path, youtube_env, fake_mp4
+):
     run_id = "run_deps_missing"
     output_mp4_rel = f"output/{run_id}/artifacts/demo.mp4"
-    _write_mp4(tmp_path, output_mp4_rel)
-    _write_quality_gate_summary(tmp_path, run_id, "pass", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_mp4(artifacts_dir, "demo.mp4", fake_mp4)
+    _write_quality_gate_summary(artifacts_dir, run_id, "pass", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_ENABLED", "true")
-
     def fake_upload(*_args, **_kwargs):
         raise orchestrator.youtube_upload.YoutubeDepsMissingError("deps missing")
 
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", fake_upload)
+    youtube_env(upload_fn=fake_upload)
 
     try:
         orchestrator.run_pipeline(pipeline_path, run_id)
@@ -248,30 +266,26 @@ def test_orchestrator_youtube_upload_failed_when_deps_missing(tmp_path, monkeypa
     else:
         raise AssertionError("Expected RuntimeError for deps missing")
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "failed"
     assert summary["error"]["code"] == "youtube_deps_missing"
     assert summary["attempt_count"] == 1
 
 
-def test_orchestrator_youtube_upload_failed_when_auth_missing(tmp_path, monkeypatch):
+def test_orchestrator_youtube_upload_failed_when_auth_missing(
+    tmp_path, youtube_env, fake_mp4
+):
     run_id = "run_auth_missing"
     output_mp4_rel = f"output/{run_id}/artifacts/demo.mp4"
-    _write_mp4(tmp_path, output_mp4_rel)
-    _write_quality_gate_summary(tmp_path, run_id, "pass", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_mp4(artifacts_dir, "demo.mp4", fake_mp4)
+    _write_quality_gate_summary(artifacts_dir, run_id, "pass", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_ENABLED", "true")
-
     def fake_upload(*_args, **_kwargs):
         raise orchestrator.youtube_upload.YoutubeAuthMissingError("auth missing")
 
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", fake_upload)
+    youtube_env(upload_fn=fake_upload)
 
     try:
         orchestrator.run_pipeline(pipeline_path, run_id)
@@ -280,29 +294,22 @@ def test_orchestrator_youtube_upload_failed_when_auth_missing(tmp_path, monkeypa
     else:
         raise AssertionError("Expected RuntimeError for auth missing")
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "failed"
     assert summary["error"]["code"] == "auth_missing_env"
     assert summary["attempt_count"] == 1
 
 
 def test_orchestrator_youtube_upload_failed_when_input_mp4_missing(
-    tmp_path, monkeypatch
+    tmp_path, youtube_env
 ):
     run_id = "run_mp4_missing"
     output_mp4_rel = f"output/{run_id}/artifacts/missing.mp4"
-    _write_quality_gate_summary(tmp_path, run_id, "pass", output_mp4_rel)
+    artifacts_dir = _ensure_artifacts(tmp_path, run_id)
+    _write_quality_gate_summary(artifacts_dir, run_id, "pass", output_mp4_rel)
     pipeline_path = _write_pipeline(tmp_path)
 
-    monkeypatch.setattr(orchestrator, "ROOT", tmp_path)
-    monkeypatch.setenv("PIPELINE_ENABLED", "true")
-    monkeypatch.setenv("YOUTUBE_UPLOAD_ENABLED", "true")
-
-    mock_upload = Mock()
-    monkeypatch.setattr(orchestrator.youtube_upload, "upload_video", mock_upload)
+    mock_upload = youtube_env()
 
     try:
         orchestrator.run_pipeline(pipeline_path, run_id)
@@ -311,10 +318,7 @@ def test_orchestrator_youtube_upload_failed_when_input_mp4_missing(
     else:
         raise AssertionError("Expected RuntimeError for missing mp4")
 
-    summary_path = (
-        tmp_path / "output" / run_id / "artifacts" / "youtube_upload_summary.json"
-    )
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = _read_upload_summary(tmp_path, run_id)
     assert summary["decision"] == "failed"
     assert summary["error"]["code"] == "input_mp4_missing"
     assert summary["attempt_count"] == 0
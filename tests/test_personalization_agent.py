@@ -1,7 +1,8 @@
 """Tests for PersonalizationAgent"""
 
+import functools
+import re
 from datetime import date, timedelta
-from unittest.mock import patch
 
 from agents.personalization import (  # noqa: E402
     EngagementMetrics,
@@ -17,43 +18,50 @@ from agents.personalization import (  # noqa: E402
 
 FIXED_TODAY = date(2025, 1, 15)
 
+_LOW_SIGNAL_ALERT_KEYWORDS = ("ความมั่นใจ", "retention ต่ำกว่า 40%", "engagement ต่ำ")
+_LOW_SIGNAL_ALERT_RE = re.compile("|".join(map(re.escape, _LOW_SIGNAL_ALERT_KEYWORDS)))
 
-def _set_fixed_today(mock_date) -> None:
-    mock_date.today.return_value = FIXED_TODAY
-    mock_date.side_effect = lambda *args, **kwargs: date(*args, **kwargs)
 
-
-def _build_sample_request(today: date = FIXED_TODAY) -> PersonalizationInput:
-    request = PersonalizationRequest(
+@functools.lru_cache(maxsize=8)
+def _sample_request_template(today: date) -> PersonalizationInput:
+    # Known-valid literal data (already in field types), so skip validation
+    request = PersonalizationRequest.model_construct(
         user_id="U001",
-        profile=UserProfile(
+        profile=UserProfile.model_construct(
             age=28,
             gender="female",
             location="Bangkok",
             interest=["นอนหลับ", "สมาธิ", "สุขภาพจิต"],
         ),
         view_history=[
-            ViewHistoryItem(
+            ViewHistoryItem.model_construct(
                 video_id="V05",
                 title="สมาธิก่อนนอน",
-                watched_pct=95,
+                watched_pct=95.0,
                 date=today - timedelta(days=1),
             ),
-            ViewHistoryItem(
+            ViewHistoryItem.model_construct(
                 video_id="V04",
                 title="สมาธิสั้น",
-                watched_pct=88,
+                watched_pct=88.0,
                 date=today - timedelta(days=10),
             ),
         ],
-        engagement=EngagementMetrics(like=8, comment=2, share=1),
+        engagement=EngagementMetrics.model_construct(like=8, comment=2, share=1),
         trend=[
-            TrendInterest(topic="นอนหลับ", score=92),
-            TrendInterest(topic="สมาธิ", score=85),
+            TrendInterest.model_construct(topic="นอนหลับ", score=92.0),
+            TrendInterest.model_construct(topic="สมาธิ", score=85.0),
         ],
-        config=PersonalizationConfig(recommend_top_n=3, min_confidence_pct=70),
+        config=PersonalizationConfig.model_construct(
+            recommend_top_n=3, min_confidence_pct=70
+        ),
     )
-    return PersonalizationInput(personalization_request=request)
+    return PersonalizationInput.model_construct(personalization_request=request)
+
+
+def _build_sample_request(today: date = FIXED_TODAY) -> PersonalizationInput:
+    # Build once per date; hand out deep copies so tests never share state
+    return _sample_request_template(today).model_copy(deep=True)
 
 
 def test_personalization_agent_initialization():
@@ -65,12 +73,10 @@ def test_personalization_agent_initialization():
     assert "คำแนะนำเฉพาะบุคคล" in agent.description
 
 
-@patch("agents.personalization.agent.date")
-def test_personalization_agent_run_returns_structured_output(mock_date):
+def test_personalization_agent_run_returns_structured_output():
     """Agent should return recommendations that respect configuration"""
 
-    _set_fixed_today(mock_date)
-    agent = PersonalizationAgent()
+    agent = PersonalizationAgent(now=lambda: FIXED_TODAY)
     input_payload = _build_sample_request()
 
     result = agent.run(input_payload)
@@ -101,11 +107,9 @@ def test_personalization_agent_run_returns_structured_output(mock_date):
     assert recommendation_block.alert == []
 
 
-@patch("agents.personalization.agent.date")
-def test_personalization_agent_flags_low_confidence_and_engagement(mock_date):
+def test_personalization_agent_flags_low_confidence_and_engagement():
     """Low retention and engagement should trigger alerts"""
 
-    _set_fixed_today(mock_date)
     today = FIXED_TODAY
     request = PersonalizationRequest(
         user_id="U002",
@@ -133,10 +137,8 @@ def test_personalization_agent_flags_low_confidence_and_engagement(mock_date):
         trend=[TrendInterest(topic="สุขภาพจิต", score=40)],
         config=PersonalizationConfig(recommend_top_n=2, min_confidence_pct=80),
     )
-    agent = PersonalizationAgent()
+    agent = PersonalizationAgent(now=lambda: FIXED_TODAY)
     result = agent.run(PersonalizationInput(personalization_request=request))
-    alerts = result.personalized_recommendation[0].alert
+    alerts = "\n".join(result.personalized_recommendation[0].alert)
 
-    assert any("ความมั่นใจ" in alert for alert in alerts)
-    assert any("retention ต่ำกว่า 40%" in alert for alert in alerts)
-    assert any("engagement ต่ำ" in alert for alert in alerts)
+    assert set(_LOW_SIGNAL_ALERT_RE.findall(alerts)) == set(_LOW_SIGNAL_ALERT_KEYWORDS)
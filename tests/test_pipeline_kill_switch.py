@@ -3,61 +3,100 @@ Unit tests for global kill switch (PIPELINE_ENABLED)
 Tests the parse_pipeline_enabled function and orchestrator behavior
 """
 
-from pathlib import Path
+import asyncio
 
+import pytest
 
-def test_parse_pipeline_enabled_none_default_enabled():
-    """When PIPELINE_ENABLED is not set, should default to enabled (True)"""
-    # Import here to avoid early import issues
-    import sys
+from app.core import runner
+from app.core.runner import ProcessJob, _parse_pipeline_enabled
+from orchestrator import main, parse_pipeline_enabled
+from tests.helpers import CountingStub
 
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from orchestrator import parse_pipeline_enabled
+_TEST_PIPELINE_YAML = b"""
+pipeline: test_pipeline
+steps:
+  - id: test_step
+    uses: prompt_pack
+    output: test_output.txt
+"""
 
-    assert parse_pipeline_enabled(None) is True
+_TEST_PIPELINE_ENABLED_YAML = b"""
+pipeline: test_pipeline_enabled
+steps:
+  - id: test_step
+    uses: nonexistent_agent_for_testing
+    output: test_output.txt
+"""
 
+_TEST_PIPELINE_DEFAULT_YAML = b"""
+pipeline: test_pipeline_default
+steps:
+  - id: test_step
+    uses: nonexistent_agent_for_testing
+    output: test_output.txt
+"""
 
-def test_parse_pipeline_enabled_true():
-    """When PIPELINE_ENABLED is 'true', should be enabled"""
-    import sys
 
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from orchestrator import parse_pipeline_enabled
+@pytest.fixture
+def runner_log_dir(tmp_path, monkeypatch):
+    """Per-test LOG_DIR so parallel workers never share output/logs/<agent>.log"""
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    monkeypatch.setattr(runner, "LOG_DIR", log_dir)
+    return log_dir
 
-    assert parse_pipeline_enabled("true") is True
-    assert parse_pipeline_enabled("True") is True
-    assert parse_pipeline_enabled("TRUE") is True
-    assert parse_pipeline_enabled("1") is True
-    assert parse_pipeline_enabled("yes") is True
-    assert parse_pipeline_enabled("YES") is True
-    assert parse_pipeline_enabled("on") is True
-    assert parse_pipeline_enabled("enabled") is True
 
+@pytest.fixture(scope="module")
+def runner_loop():
+    """Event loop shared by the ProcessJob tests instead of asyncio.run() per test"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
-def test_parse_pipeline_enabled_false():
-    """When PIPELINE_ENABLED is 'false', should be disabled"""
-    import sys
 
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from orchestrator import parse_pipeline_enabled
+class _FakeProcess:
+    """Minimal stand-in for asyncio.subprocess.Process (no pipes, exit 0)"""
 
-    assert parse_pipeline_enabled("false") is False
-    assert parse_pipeline_enabled("False") is False
-    assert parse_pipeline_enabled("FALSE") is False
-    assert parse_pipeline_enabled("0") is False
-    assert parse_pipeline_enabled("no") is False
-    assert parse_pipeline_enabled("NO") is False
-    assert parse_pipeline_enabled("off") is False
-    assert parse_pipeline_enabled("disabled") is False
+    stdout = None
+    stderr = None
 
+    async def wait(self) -> int:
+        return 0
 
-def test_parse_pipeline_enabled_whitespace():
-    """Should handle whitespace correctly"""
-    import sys
 
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from orchestrator import parse_pipeline_enabled
+def test_parse_pipeline_enabled_none_default_enabled():
+    """When PIPELINE_ENABLED is not set, should default to enabled (True)"""
+    assert parse_pipeline_enabled(None) is True
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("true", True),
+        ("True", True),
+        ("TRUE", True),
+        ("1", True),
+        ("yes", True),
+        ("YES", True),
+        ("on", True),
+        ("enabled", True),
+        ("false", False),
+        ("False", False),
+        ("FALSE", False),
+        ("0", False),
+        ("no", False),
+        ("NO", False),
+        ("off", False),
+        ("disabled", False),
+    ],
+)
+def test_parse_pipeline_enabled(value, expected):
+    """PIPELINE_ENABLED values map to enabled/disabled (case-insensitive)"""
+    assert parse_pipeline_enabled(value) is expected
+
 
+def test_parse_pipeline_enabled_whitespace():
+    """Should handle whitespace correctly"""
     assert parse_pipeline_enabled("  false  ") is False
     assert parse_pipeline_enabled("  true  ") is True
 
@@ -67,20 +106,9 @@ def test_orchestrator_main_with_kill_switch_disabled(tmp_path, monkeypatch, caps
     Test that orchestrator.main() exits with 0 when PIPELINE_ENABLED=false
     and does NOT run the pipeline
     """
-    import sys
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from orchestrator import main
-
     # Create a minimal pipeline YAML file
     pipeline_file = tmp_path / "test_pipeline.yml"
-    pipeline_file.write_text("""
-pipeline: test_pipeline
-steps:
-  - id: test_step
-    uses: prompt_pack
-    output: test_output.txt
-""")
+    pipeline_file.write_bytes(_TEST_PIPELINE_YAML)
 
     # Mock sys.argv to provide CLI args
     monkeypatch.setattr(
@@ -113,20 +141,9 @@ def test_orchestrator_main_with_kill_switch_enabled(tmp_path, monkeypatch, capsy
     Test that orchestrator.main() attempts to run when PIPELINE_ENABLED=true
     We expect it to fail with agent not found (which proves kill switch is not active)
     """
-    import sys
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from orchestrator import main
-
     # Create a minimal pipeline YAML file
     pipeline_file = tmp_path / "test_pipeline.yml"
-    pipeline_file.write_text("""
-pipeline: test_pipeline_enabled
-steps:
-  - id: test_step
-    uses: nonexistent_agent_for_testing
-    output: test_output.txt
-""")
+    pipeline_file.write_bytes(_TEST_PIPELINE_ENABLED_YAML)
 
     # Mock sys.argv to provide CLI args
     monkeypatch.setattr(
@@ -163,20 +180,9 @@ def test_orchestrator_main_with_kill_switch_not_set(tmp_path, monkeypatch, capsy
     (default behavior = enabled). We expect it to fail with agent not found,
     which proves kill switch defaults to disabled/not active.
     """
-    import sys
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from orchestrator import main
-
     # Create a minimal pipeline YAML file
     pipeline_file = tmp_path / "test_pipeline.yml"
-    pipeline_file.write_text("""
-pipeline: test_pipeline_default
-steps:
-  - id: test_step
-    uses: nonexistent_agent_for_testing
-    output: test_output.txt
-""")
+    pipeline_file.write_bytes(_TEST_PIPELINE_DEFAULT_YAML)
 
     # Mock sys.argv to provide CLI args
     monkeypatch.setattr(
@@ -209,11 +215,6 @@ steps:
 
 def test_web_runner_parse_pipeline_enabled():
     """Test the _parse_pipeline_enabled function in app/core/runner.py"""
-    import sys
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from app.core.runner import _parse_pipeline_enabled
-
     # Test default (None = enabled)
     assert _parse_pipeline_enabled(None) is True
 
@@ -228,122 +229,101 @@ def test_web_runner_parse_pipeline_enabled():
     assert _parse_pipeline_enabled("1") is True
 
 
-def test_web_runner_no_subprocess_spawn_when_disabled(monkeypatch):
+def test_web_runner_no_subprocess_spawn_when_disabled(monkeypatch, runner_loop):
     """
     CRITICAL: When PIPELINE_ENABLED=false, ProcessJob.start() should
     NOT call asyncio.create_subprocess_exec()
     This ensures no partial output artifacts are created
     """
-    import asyncio
-    import sys
-    from pathlib import Path
-    from unittest.mock import AsyncMock, patch
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from app.core.runner import ProcessJob
-
     monkeypatch.setenv("PIPELINE_ENABLED", "false")
 
     job = ProcessJob("test_agent", ["python", "-c", "print('test')"])
 
-    # Mock the subprocess function and _append_file_log
-    with (
-        patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_spawn,
-        patch.object(job, "_append_file_log") as mock_file_log,
-    ):
-        # Run the async start() method
-        asyncio.run(job.start())
+    # Stub the subprocess function and _append_file_log
+    spawn_calls: list[tuple] = []
+
+    async def fake_spawn(*args, **kwargs):
+        spawn_calls.append((args, kwargs))
+
+    file_log = CountingStub()
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_spawn)
+    monkeypatch.setattr(job, "_append_file_log", file_log)
 
-        # ✅ ASSERT: subprocess MUST NOT be called
-        mock_spawn.assert_not_called()
+    # Run the async start() method
+    runner_loop.run_until_complete(job.start())
 
-        # ✅ ASSERT: _append_file_log MUST NOT be called (no file artifacts when disabled)
-        mock_file_log.assert_not_called()
+    # ✅ ASSERT: subprocess MUST NOT be called
+    assert spawn_calls == []
 
-        # ✅ ASSERT: status should be "disabled"
-        assert job.status == "disabled", (
-            f"Expected status='disabled', got '{job.status}'"
-        )
+    # ✅ ASSERT: _append_file_log MUST NOT be called (no file artifacts when disabled)
+    assert file_log.call_count == 0
 
-        # ✅ ASSERT: log should contain [DISABLED] message
-        log_text = "\n".join(job.log)
-        assert "DISABLED" in log_text, f"Expected '[DISABLED]' in logs, got: {log_text}"
+    # ✅ ASSERT: status should be "disabled"
+    assert job.status == "disabled", f"Expected status='disabled', got '{job.status}'"
 
-        # ✅ ASSERT: No process object created
-        assert job.proc is None, "Process object should not be created when disabled"
+    # ✅ ASSERT: log should contain [DISABLED] message
+    log_text = "\n".join(job.log)
+    assert "DISABLED" in log_text, f"Expected '[DISABLED]' in logs, got: {log_text}"
 
-        # ✅ ASSERT: Progress should be at 100 (completed state)
-        assert job.progress == 100
+    # ✅ ASSERT: No process object created
+    assert job.proc is None, "Process object should not be created when disabled"
 
+    # ✅ ASSERT: Progress should be at 100 (completed state)
+    assert job.progress == 100
 
-def test_web_runner_subprocess_spawn_when_enabled(monkeypatch):
+
+def test_web_runner_subprocess_spawn_when_enabled(monkeypatch, runner_loop):
     """
     CONTROL: When PIPELINE_ENABLED=true (or not set), ProcessJob.start()
     SHOULD call asyncio.create_subprocess_exec() to spawn subprocess
     """
-    import asyncio
-    import sys
-    from pathlib import Path
-    from unittest.mock import AsyncMock, patch
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from app.core.runner import ProcessJob
-
     # Ensure PIPELINE_ENABLED is true
     monkeypatch.setenv("PIPELINE_ENABLED", "true")
 
     job = ProcessJob("test_agent", ["python", "-c", "print('enabled')"])
 
-    # Mock the subprocess function to avoid actual spawn
-    with patch("asyncio.create_subprocess_exec", new_callable=AsyncMock) as mock_spawn:
-        # Mock a process object
-        mock_proc = AsyncMock()
-        mock_proc.communicate = AsyncMock(return_value=(b"output", b""))
-        mock_spawn.return_value = mock_proc
+    # Stub the subprocess function to avoid actual spawn
+    spawn_calls: list[tuple] = []
+
+    async def fake_spawn(*args, **kwargs):
+        spawn_calls.append((args, kwargs))
+        return _FakeProcess()
 
-        # Run the async start() method
-        asyncio.run(job.start())
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_spawn)
+    monkeypatch.setattr(job, "_append_file_log", CountingStub())
 
-        # ✅ ASSERT: subprocess MUST be called when enabled
-        mock_spawn.assert_called_once()
+    # Run the async start() method
+    runner_loop.run_until_complete(job.start())
 
-        # ✅ ASSERT: status should be "starting" (not disabled)
-        assert job.status != "disabled", "Status should not be 'disabled' when enabled"
+    # ✅ ASSERT: subprocess MUST be called when enabled
+    assert len(spawn_calls) == 1
 
-        # ✅ ASSERT: No [DISABLED] in logs
-        log_text = "\n".join(job.log)
-        assert "DISABLED" not in log_text, (
-            f"Should not have [DISABLED] when enabled, got: {log_text}"
-        )
+    # ✅ ASSERT: status should be "starting" (not disabled)
+    assert job.status != "disabled", "Status should not be 'disabled' when enabled"
+
+    # ✅ ASSERT: No [DISABLED] in logs
+    log_text = "\n".join(job.log)
+    assert "DISABLED" not in log_text, (
+        f"Should not have [DISABLED] when enabled, got: {log_text}"
+    )
 
 
-def test_web_runner_no_log_file_created_when_disabled(monkeypatch):
+def test_web_runner_no_log_file_created_when_disabled(
+    monkeypatch, runner_log_dir, runner_loop
+):
     """
     When PIPELINE_ENABLED=false, runner must NOT create a new log file
     under output/logs/ for that agent.
     """
-    import asyncio
-    import sys
-    from pathlib import Path
-
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from app.core.runner import LOG_DIR, ProcessJob
-
     monkeypatch.setenv("PIPELINE_ENABLED", "false")
 
     agent_key = "no_log_when_disabled"
-    log_path = LOG_DIR / f"{agent_key}.log"
-    # Ensure clean state
-    try:
-        if log_path.exists():
-            log_path.unlink()
-    except Exception:
-        pass
+    log_path = runner_log_dir / f"{agent_key}.log"
 
     job = ProcessJob(agent_key, ["python", "-c", "print('noop')"])
 
     # Run disabled start
-    asyncio.run(job.start())
+    runner_loop.run_until_complete(job.start())
 
     # Assert log file was NOT created
     assert not log_path.exists(), (
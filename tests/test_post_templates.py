@@ -22,10 +22,27 @@
 
 from __future__ import annotations
 
-import json
+from collections.abc import Iterable
 from pathlib import Path
 
+import pytest
+
 from automation_core import post_templates
+from tests.helpers import (
+    LONG_TEMPLATE_BYTES,
+    SHORT_TEMPLATE_BYTES,
+    dump_json,
+    load_json,
+    write_bytes,
+)
+
+# ค่าพารามิเตอร์ของเทส สร้าง (และ serialize) ครั้งเดียวตอน import โมดูล
+_SCHEMA_PARAMS_JSON = dump_json({"hook": "Hook", "cta": "Go"}).decode("utf-8")
+_DETERMINISTIC_PARAMS = {
+    "title": "Same Title",
+    "summary": "Same Summary",
+    "hashtags": ["#b", "#a"],
+}
 
 
 def _write_templates(
@@ -33,6 +50,7 @@ def _write_templates(
 ) -> None:
     """
     เขียนไฟล์เทมเพลต short.md และ long.md ลงในโฟลเดอร์ templates/post
+    ใช้เฉพาะเทสที่ต้องการเนื้อหาเทมเพลตเอง เทมเพลตเริ่มต้นให้ใช้ fixture post_templates
 
     Args:
         base_dir: directory ฐานสำหรับการทดสอบ
@@ -41,14 +59,13 @@ def _write_templates(
     """
     templates_dir = base_dir / "templates" / "post"
     templates_dir.mkdir(parents=True, exist_ok=True)
-    (templates_dir / "short.md").write_text(
-        short_text or "{{hook}}\n{{summary}}\n\n{{cta}}\n{{hashtags}}\n",
-        encoding="utf-8",
+    write_bytes(
+        templates_dir / "short.md",
+        short_text.encode() if short_text else SHORT_TEMPLATE_BYTES,
     )
-    (templates_dir / "long.md").write_text(
-        long_text
-        or "{{title}}\n\n{{hook}}\n\n{{summary}}\n\n{{cta}}\n\n{{hashtags}}\n",
-        encoding="utf-8",
+    write_bytes(
+        templates_dir / "long.md",
+        long_text.encode() if long_text else LONG_TEMPLATE_BYTES,
     )
 
 
@@ -63,26 +80,26 @@ def _write_metadata(base_dir: Path, run_id: str, payload: dict[str, object]) ->
     """
     metadata_path = base_dir / "output" / run_id / "metadata.json"
     metadata_path.parent.mkdir(parents=True, exist_ok=True)
-    metadata_path.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    write_bytes(metadata_path, dump_json(payload))
 
 
-def _assert_relative(value: str) -> None:
+def _assert_all_relative(values: Iterable[str]) -> None:
     """
-    ตรวจสอบว่า path เป็น relative path ที่ปลอดภัย (ไม่ absolute และไม่มี ..)
+    ตรวจสอบว่าทุก path เป็น relative path ที่ปลอดภัย (ไม่ absolute และไม่มี ..)
 
     Args:
-        value: path ที่ต้องการตรวจสอบ
+        values: path ที่ต้องการตรวจสอบ
 
     Raises:
-        AssertionError: ถ้า path เป็น absolute หรือมี '..'
+        AssertionError: ถ้ามี path ใดเป็น absolute หรือมี '..'
     """
-    path = Path(value)
-    assert not path.is_absolute()
-    assert ".." not in path.parts
+    for value in values:
+        path = Path(value)
+        assert not path.is_absolute(), value
+        assert ".." not in path.parts, value
 
 
+@pytest.mark.usefixtures("post_templates")
 def test_post_content_summary_schema(tmp_path, monkeypatch):
     """
     ทดสอบโครงสร้าง schema ของ post_content_summary.json
@@ -91,7 +108,6 @@ def test_post_content_summary_schema(tmp_path, monkeypatch):
     เป็น relative path ที่ปลอดภัย
     """
     run_id = "run_schema"
-    _write_templates(tmp_path)
     _write_metadata(
         tmp_path,
         run_id,
@@ -104,9 +120,7 @@ def test_post_content_summary_schema(tmp_path, monkeypatch):
         },
     )
 
-    monkeypatch.setenv(
-        "PIPELINE_PARAMS_JSON", json.dumps({"hook": "Hook", "cta": "Go"})
-    )
+    monkeypatch.setenv("PIPELINE_PARAMS_JSON", _SCHEMA_PARAMS_JSON)
     monkeypatch.setenv("PIPELINE_ENABLED", "true")
 
     _, summary_path = post_templates.generate_post_content_summary(
@@ -114,7 +128,7 @@ def test_post_content_summary_schema(tmp_path, monkeypatch):
     )
     assert summary_path.exists()
 
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    summary = load_json(summary_path.read_bytes())
     assert summary["schema_version"] == "v1"
     assert summary["engine"] == "post_templates"
     assert summary["run_id"] == run_id
@@ -132,74 +146,77 @@ def test_post_content_summary_schema(tmp_path, monkeypatch):
         f"output/{run_id}/metadata.json",
     ]
 
-    _assert_relative(inputs["template_short"])
-    _assert_relative(inputs["template_long"])
-    for source in inputs["sources"]:
-        if source == post_templates.ENV_SOURCE:
-            continue
-        _assert_relative(source)
+    _assert_all_relative(
+        [
+            inputs["template_short"],
+            inputs["template_long"],
+            *(
+                source
+                for source in inputs["sources"]
+                if source != post_templates.ENV_SOURCE
+            ),
+        ]
+    )
 
     assert isinstance(outputs["short"], str)
     assert isinstance(outputs["long"], str)
 
 
-def test_render_deterministic_outputs(tmp_path, monkeypatch):
+@pytest.mark.usefixtures("post_templates")
+def test_render_deterministic_outputs(tmp_path):
     """
     ทดสอบว่าการเรนเดอร์เทมเพลตให้ผลลัพธ์แบบ deterministic
 
     เรียกเรนเดอร์ด้วยข้อมูลชุดเดิมสองครั้งจะต้องได้เนื้อหาเท่ากันทุกครั้ง
     """
     run_id = "run_det"
-    _write_templates(tmp_path)
-
-    payload = {
-        "title": "Same Title",
-        "summary": "Same Summary",
-        "hashtags": ["#b", "#a"],
-    }
-    monkeypatch.setenv("PIPELINE_PARAMS_JSON", json.dumps(payload))
 
-    first = post_templates.render_post_templates(run_id, base_dir=tmp_path)
-    second = post_templates.render_post_templates(run_id, base_dir=tmp_path)
+    first = post_templates.render_post_templates(
+        run_id, base_dir=tmp_path, pipeline_params=_DETERMINISTIC_PARAMS
+    )
+    second = post_templates.render_post_templates(
+        run_id, base_dir=tmp_path, pipeline_params=_DETERMINISTIC_PARAMS
+    )
 
     assert first["short"] == second["short"]
     assert first["long"] == second["long"]
 
 
-def test_hashtag_normalization_list(tmp_path, monkeypatch):
+@pytest.mark.usefixtures("post_templates")
+def test_pipeline_params_override_env(tmp_path, monkeypatch):
     """
-    ทดสอบการ normalize แฮชแท็กที่รับค่าเป็น list
+    ทดสอบว่า pipeline_params (dict ที่ parse แล้ว) ถูกใช้แทน PIPELINE_PARAMS_JSON
 
-    ตรวจสอบว่าแฮชแท็กถูกจัดเรียง trim ช่องว่าง และรวมเป็นสตริงเดียวอย่างถูกต้อง
+    ค่าใน env ต้องไม่ถูกอ่าน และ source ยังคงรายงานเป็น ENV_SOURCE
     """
-    run_id = "run_tags"
-    _write_templates(tmp_path, short_text="{{hashtags}}\n", long_text="{{hashtags}}\n")
+    monkeypatch.setenv("PIPELINE_PARAMS_JSON", "not json")
 
-    monkeypatch.setenv(
-        "PIPELINE_PARAMS_JSON",
-        json.dumps({"hashtags": ["#b", " #c ", "#a"]}),
+    rendered = post_templates.render_post_templates(
+        "run_params", base_dir=tmp_path, pipeline_params={"hook": "Hook"}
     )
-
-    rendered = post_templates.render_post_templates(run_id, base_dir=tmp_path)
-    assert rendered["short"].strip() == "#a #b #c"
-    assert rendered["long"].strip() == "#a #b #c"
-
-
-def test_hashtag_normalization_string(tmp_path, monkeypatch):
+    assert rendered["short"].startswith("Hook\n")
+    assert rendered["sources"] == [post_templates.ENV_SOURCE]
+
+
+@pytest.mark.parametrize(
+    ("run_id", "hashtags"),
+    [
+        ("run_tags", ["#b", " #c ", "#a"]),
+        ("run_tags_str", "  #b   #a  #c  "),
+    ],
+    ids=["list", "string"],
+)
+def test_hashtag_normalization(tmp_path, run_id, hashtags):
     """
-    ทดสอบการ normalize แฮชแท็กที่รับค่าเป็น string
+    ทดสอบการ normalize แฮชแท็กทั้งแบบ list และแบบ string
 
-    ตรวจสอบว่าแฮชแท็กที่เป็นสตริงถูกแยกคำ จัดเรียง และตัดช่องว่างส่วนเกินอย่างถูกต้อง
+    ตรวจสอบว่าแฮชแท็กถูกแยกคำ จัดเรียง trim ช่องว่าง และรวมเป็นสตริงเดียวอย่างถูกต้อง
     """
-    run_id = "run_tags_str"
     _write_templates(tmp_path, short_text="{{hashtags}}\n", long_text="{{hashtags}}\n")
 
-    monkeypatch.setenv(
-        "PIPELINE_PARAMS_JSON",
-        json.dumps({"hashtags": "  #b   #a  #c  "}),
+    rendered = post_templates.render_post_templates(
+        run_id, base_dir=tmp_path, pipeline_params={"hashtags": hashtags}
     )
-
-    rendered = post_templates.render_post_templates(run_id, base_dir=tmp_path)
     assert rendered["short"].strip() == "#a #b #c"
     assert rendered["long"].strip() == "#a #b #c"
 
@@ -211,7 +228,6 @@ def test_kill_switch_prevents_writes(tmp_path, monkeypatch):
     เรียก cli_main ด้วย PIPELINE_ENABLED=false ต้องไม่มีไฟล์ใด ๆ ถูกสร้างในโฟลเดอร์ output
     """
     run_id = "run_disabled"
-    _write_templates(tmp_path)
 
     monkeypatch.setattr(post_templates, "REPO_ROOT", tmp_path)
     monkeypatch.setenv("PIPELINE_ENABLED", "false")
@@ -221,6 +237,7 @@ def test_kill_switch_prevents_writes(tmp_path, monkeypatch):
     assert not (tmp_path / "output").exists()
 
 
+@pytest.mark.usefixtures("post_templates")
 def test_kill_switch_prevents_direct_call_writes(tmp_path, monkeypatch):
     """
     ทดสอบกลไก kill-switch ผ่านการเรียกฟังก์ชันโดยตรง
@@ -229,18 +246,19 @@ def test_kill_switch_prevents_direct_call_writes(tmp_path, monkeypatch):
     ต้องไม่มีไฟล์ใด ๆ ถูกสร้างในโฟลเดอร์ output
     """
     run_id = "run_disabled_direct"
-    _write_templates(tmp_path)
 
     monkeypatch.setenv("PIPELINE_ENABLED", "false")
 
+    expected = tmp_path.joinpath(
+        "output", run_id, "artifacts", "post_content_summary.json"
+    )
+
     _, summary_path = post_templates.generate_post_content_summary(
         run_id, base_dir=tmp_path
     )
-    assert summary_path == (
-        tmp_path / "output" / run_id / "artifacts" / "post_content_summary.json"
-    )
+    assert summary_path == expected
     assert not (tmp_path / "output").exists()
-    assert not summary_path.exists()
+    assert not expected.exists()
 
 
 def test_unknown_placeholder_fails_without_writes(tmp_path, monkeypatch):
@@ -3,43 +3,30 @@
 ตรวจสอบการทำงานของ prompt_loader module
 """
 
-import sys
-import tempfile
 from pathlib import Path
 
 import pytest
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
 from automation_core.prompt_loader import PromptLoadError, get_prompt_path, load_prompt
 
 
 class TestPromptLoader:
     """ทดสอบการโหลด prompt templates"""
 
-    def test_load_prompt_success(self):
+    def test_load_prompt_success(self, tmp_path):
         """ทดสอบการโหลด prompt สำเร็จ"""
         # สร้างไฟล์ชั่วคราว
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            test_content = "คุณคือ AI Assistant ที่ช่วยเหลือผู้ใช้\nตอบคำถามด้วยความสุภาพ"
-            f.write(test_content)
-            temp_path = f.name
-
-        try:
-            # โหลด prompt
-            content = load_prompt(temp_path)
+        test_content = "คุณคือ AI Assistant ที่ช่วยเหลือผู้ใช้\nตอบคำถามด้วยความสุภาพ"
+        temp_path = tmp_path / "prompt.txt"
+        temp_path.write_text(test_content, encoding="utf-8")
 
-            # ตรวจสอบผลลัพธ์
-            assert content == test_content
-            assert isinstance(content, str)
-            assert len(content) > 0
+        # โหลด prompt (ส่งเป็น str)
+        content = load_prompt(str(temp_path))
 
-        finally:
-            # ลบไฟล์ชั่วคราว
-            Path(temp_path).unlink()
+        # ตรวจสอบผลลัพธ์
+        assert content == test_content
+        assert isinstance(content, str)
+        assert len(content) > 0
 
     def test_load_prompt_file_not_found(self):
         """ทดสอบเมื่อไฟล์ไม่พบ"""
@@ -50,70 +37,47 @@ class TestPromptLoader:
 
         assert "ไม่พบไฟล์ prompt" in str(exc_info.value)
 
-    def test_load_prompt_empty_file(self):
+    def test_load_prompt_empty_file(self, tmp_path):
         """ทดสอบเมื่อไฟล์ว่าง"""
         # สร้างไฟล์ว่าง
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            f.write("")  # ไฟล์ว่าง
-            temp_path = f.name
-
-        try:
-            with pytest.raises(PromptLoadError) as exc_info:
-                load_prompt(temp_path)
+        temp_path = tmp_path / "empty.txt"
+        temp_path.write_text("", encoding="utf-8")
 
-            assert "ไฟล์ prompt ว่าง" in str(exc_info.value)
+        with pytest.raises(PromptLoadError) as exc_info:
+            load_prompt(str(temp_path))
 
-        finally:
-            Path(temp_path).unlink()
+        assert "ไฟล์ prompt ว่าง" in str(exc_info.value)
 
-    def test_load_prompt_whitespace_only(self):
+    def test_load_prompt_whitespace_only(self, tmp_path):
         """ทดสอบเมื่อไฟล์มีแต่ช่องว่าง"""
         # สร้างไฟล์ที่มีแต่ช่องว่าง
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            f.write("   \n   \t   \n   ")  # มีแต่ whitespace
-            temp_path = f.name
-
-        try:
-            with pytest.raises(PromptLoadError) as exc_info:
-                load_prompt(temp_path)
+        temp_path = tmp_path / "whitespace.txt"
+        temp_path.write_text("   \n   \t   \n   ", encoding="utf-8")
 
-            assert "ไฟล์ prompt ว่าง" in str(exc_info.value)
+        with pytest.raises(PromptLoadError) as exc_info:
+            load_prompt(str(temp_path))
 
-        finally:
-            Path(temp_path).unlink()
+        assert "ไฟล์ prompt ว่าง" in str(exc_info.value)
 
-    def test_load_prompt_directory_instead_of_file(self):
+    def test_load_prompt_directory_instead_of_file(self, tmp_path):
         """ทดสอบเมื่อส่ง directory แทนไฟล์"""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with pytest.raises(PromptLoadError) as exc_info:
-                load_prompt(temp_dir)
+        with pytest.raises(PromptLoadError) as exc_info:
+            load_prompt(str(tmp_path))
 
-            assert "ไม่ใช่ไฟล์" in str(exc_info.value)
+        assert "ไม่ใช่ไฟล์" in str(exc_info.value)
 
-    def test_load_prompt_with_path_object(self):
+    def test_load_prompt_with_path_object(self, tmp_path):
         """ทดสอบการใช้ Path object"""
-        # สร้างไฟล์ชั่วคราว
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            test_content = "ทดสอบการใช้ Path object"
-            f.write(test_content)
-            temp_path = Path(f.name)
+        test_content = "ทดสอบการใช้ Path object"
+        temp_path = tmp_path / "prompt.txt"
+        temp_path.write_text(test_content, encoding="utf-8")
 
-        try:
-            # โหลด prompt ด้วย Path object
-            content = load_prompt(temp_path)
+        # โหลด prompt ด้วย Path object
+        content = load_prompt(temp_path)
 
-            assert content == test_content
+        assert content == test_content
 
-        finally:
-            temp_path.unlink()
-
-    def test_load_prompt_thai_content(self):
+    def test_load_prompt_thai_content(self, tmp_path):
         """ทดสอบการโหลดเนื้อหาภาษาไทย"""
         thai_content = """คุณคือ AI ผู้ช่วยสำหรับช่อง YouTube ธรรมะดีดี
 
@@ -124,44 +88,27 @@ class TestPromptLoader:
 - เนื้อหาเชิงบวกและสร้างสรรค์
 - นำหลักธรรมมาประยุกต์ในชีวิตประจำวัน"""
 
-        # สร้างไฟล์ชั่วคราว
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            f.write(thai_content)
-            temp_path = f.name
+        temp_path = tmp_path / "thai.txt"
+        temp_path.write_text(thai_content, encoding="utf-8")
 
-        try:
-            # โหลด prompt
-            content = load_prompt(temp_path)
+        # โหลด prompt
+        content = load_prompt(str(temp_path))
 
-            # ตรวจสอบว่าภาษาไทยโหลดได้ถูกต้อง
-            assert "ธรรมะดีดี" in content
-            assert "วิเคราะห์เทรนด์" in content
-            assert "หลักธรรม" in content
-            assert content == thai_content
+        # ตรวจสอบว่าภาษาไทยโหลดได้ถูกต้อง
+        assert "ธรรมะดีดี" in content
+        assert "วิเคราะห์เทรนด์" in content
+        assert "หลักธรรม" in content
+        assert content == thai_content
 
-        finally:
-            Path(temp_path).unlink()
-
-    def test_load_prompt_custom_encoding(self):
+    def test_load_prompt_custom_encoding(self, tmp_path):
         """ทดสอบการใช้ encoding ที่กำหนดเอง"""
-        # สร้างไฟล์ด้วย encoding ที่แตกต่าง
         test_content = "ทดสอบ encoding ภาษาไทย"
+        temp_path = tmp_path / "encoding.txt"
+        temp_path.write_text(test_content, encoding="utf-8")
 
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as f:
-            f.write(test_content)
-            temp_path = f.name
-
-        try:
-            # โหลดด้วย encoding ที่ถูกต้อง
-            content = load_prompt(temp_path, encoding="utf-8")
-            assert content == test_content
-
-        finally:
-            Path(temp_path).unlink()
+        # โหลดด้วย encoding ที่ถูกต้อง
+        content = load_prompt(str(temp_path), encoding="utf-8")
+        assert content == test_content
 
 
 class TestGetPromptPath:
@@ -187,6 +134,16 @@ class TestGetPromptPath:
         assert prompt_name in str(path)
         assert custom_dir in str(path)
 
+    def test_get_prompt_path_is_cached(self):
+        """ทดสอบว่าการเรียกซ้ำด้วยอาร์กิวเมนต์เดิมใช้ผลจาก cache"""
+        get_prompt_path.cache_clear()
+
+        first = get_prompt_path("trend_scout_v1.txt")
+        second = get_prompt_path("trend_scout_v1.txt")
+
+        assert first is second
+        assert get_prompt_path.cache_info().hits == 1
+
 
 class TestPromptIntegration:
     """ทดสอบการรวมกับไฟล์ prompt จริง"""
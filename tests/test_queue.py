@@ -9,32 +9,44 @@
 """
 
 from datetime import UTC, datetime, timedelta
-from pathlib import Path
-
-from automation_core.queue import FileQueue, JobError, JobSpec
 
+import pytest
 
-def _utc_iso(value: datetime) -> str:
-    return value.astimezone(UTC).isoformat().replace("+00:00", "Z")
+from automation_core.queue import FileQueue, JobError, JobSpec
+from automation_core.scheduler import format_utc
+
+# created_at ไม่มีผลกับการทดสอบ จึงคำนวณครั้งเดียวตอน import โมดูลแล้วใช้ template ร่วมกัน
+_JOB_TEMPLATE = JobSpec(
+    schema_version="v1",
+    job_id="",
+    created_at=format_utc(datetime.now(UTC)),
+    scheduled_for="",
+    pipeline_path="pipeline.web.yml",
+    run_id="",
+    params=None,
+    status="pending",
+    attempts=0,
+    last_error=None,
+)
 
 
 def _build_job(job_id: str, scheduled_for: datetime, run_id: str) -> JobSpec:
-    return JobSpec(
-        schema_version="v1",
-        job_id=job_id,
-        created_at=_utc_iso(datetime.now(UTC)),
-        scheduled_for=_utc_iso(scheduled_for),
-        pipeline_path="pipeline.web.yml",
-        run_id=run_id,
-        params=None,
-        status="pending",
-        attempts=0,
-        last_error=None,
+    return _JOB_TEMPLATE.model_copy(
+        update={
+            "job_id": job_id,
+            "scheduled_for": format_utc(scheduled_for),
+            "run_id": run_id,
+        }
     )
 
 
-def test_enqueue_idempotent(tmp_path: Path):
-    queue = FileQueue(tmp_path / "queue")
+@pytest.fixture
+def queue(tmp_path) -> FileQueue:
+    """คิวใหม่ต่อเทส (แค่สร้าง object, โฟลเดอร์ state ถูกสร้างเมื่อใช้งานจริง)"""
+    return FileQueue(tmp_path / "queue")
+
+
+def test_enqueue_idempotent(queue: FileQueue):
     now = datetime(2026, 1, 1, 0, 0, tzinfo=UTC)
     job = _build_job("job-001", now, "run_001")
 
@@ -46,8 +58,7 @@ def test_enqueue_idempotent(tmp_path: Path):
     assert pending[0].job_id == "job-001"
 
 
-def test_fifo_ordering_by_schedule(tmp_path: Path):
-    queue = FileQueue(tmp_path / "queue")
+def test_fifo_ordering_by_schedule(queue: FileQueue):
     now = datetime(2026, 1, 1, 0, 0, tzinfo=UTC)
     job_early = _build_job("job-early", now, "run_early")
     job_late = _build_job("job-late", now + timedelta(minutes=5), "run_late")
@@ -59,8 +70,7 @@ def test_fifo_ordering_by_schedule(tmp_path: Path):
     assert [item.job_id for item in pending] == ["job-early", "job-late"]
 
 
-def test_state_transitions(tmp_path: Path):
-    queue = FileQueue(tmp_path / "queue")
+def test_state_transitions(queue: FileQueue):
     now = datetime(2026, 1, 1, 0, 0, tzinfo=UTC)
     job_done = _build_job("job-done", now, "run_done")
     job_failed = _build_job("job-failed", now + timedelta(minutes=1), "run_fail")
@@ -92,8 +102,7 @@ def test_state_transitions(tmp_path: Path):
     assert (queue.failed_dir / failed_item.filename).exists()
 
 
-def test_enqueue_idempotent_across_states(tmp_path: Path):
-    queue = FileQueue(tmp_path / "queue")
+def test_enqueue_idempotent_across_states(queue: FileQueue):
     now = datetime(2026, 1, 1, 0, 0, tzinfo=UTC)
     job_done = _build_job("job-done", now, "run_done")
     job_failed = _build_job("job-failed", now + timedelta(minutes=1), "run_fail")
@@ -114,14 +123,13 @@ def test_enqueue_idempotent_across_states(tmp_path: Path):
     assert queue.enqueue(job_failed) is False
 
 
-def test_enqueue_dry_run_mode(tmp_path: Path):
+def test_enqueue_dry_run_mode(queue: FileQueue):
     """
     ทดสอบ dry_run mode ของ enqueue
 
     dry_run=True ควรทำงานเหมือนปกติแต่ไม่เขียนไฟล์
     """
 
-    queue = FileQueue(tmp_path / "queue")
     now = datetime(2026, 1, 1, 0, 0, tzinfo=UTC)
     job = _build_job("job-001", now, "run_001")
 
@@ -1,244 +1,199 @@
 """ทดสอบการคัดเลือกงานตามแผนเวลา"""
 
-import hashlib
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from zoneinfo import ZoneInfo
 
 import pytest
 
 from automation_core.queue import FileQueue
-from automation_core.scheduler import SchedulePlanError, schedule_due_jobs
-
-
-def _utc_iso(value: datetime) -> str:
-    return value.astimezone(UTC).isoformat().replace("+00:00", "Z")
-
-
-def _write_plan(path: Path) -> None:
-    path.write_text(
-        "\n".join(
-            [
-                'schema_version: "v1"',
-                'timezone: "Asia/Bangkok"',
-                "entries:",
-                '  - publish_at: "2026-01-01T10:00"',
-                '    pipeline_path: "pipeline.web.yml"',
-                '  - publish_at: "2026-01-01T10:05+07:00"',
-                '    pipeline_path: "pipeline.web.yml"',
-                '    run_id_prefix: "mid_morning"',
-                '  - publish_at: "2026-01-01T10:30"',
-                '    pipeline_path: "pipeline.web.yml"',
-            ]
-        ),
-        encoding="utf-8",
-    )
-
+from automation_core.scheduler import (
+    SchedulePlanError,
+    ScheduleResult,
+    build_job_id,
+    schedule_due_jobs,
+)
 
-def test_scheduler_due_selection_deterministic(tmp_path: Path):
-    plan_path = tmp_path / "schedule_plan.yaml"
-    _write_plan(plan_path)
+# ให้ทุกเทสในไฟล์นี้อยู่ worker เดียวกันเมื่อรันด้วย xdist --dist loadgroup
+# (ใช้ shared_scheduler_env ระดับโมดูลร่วมกัน)
+pytestmark = pytest.mark.xdist_group(name="scheduler")
+
+_NOW_UTC = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
+_SCHEDULE_HEADER = 'schema_version: "v1"\ntimezone: "Asia/Bangkok"\nentries:\n'
+_ENTRY_TEMPLATE = """\
+  - publish_at: "{publish_at}"
+    pipeline_path: "{pipeline_path}"
+"""
+_SINGLE_ENTRY = _ENTRY_TEMPLATE.format(
+    publish_at="2026-01-01T10:00", pipeline_path="pipeline.web.yml"
+)
+_DETERMINISTIC_ENTRIES = """\
+  - publish_at: "2026-01-01T10:00"
+    pipeline_path: "pipeline.web.yml"
+  - publish_at: "2026-01-01T10:05+07:00"
+    pipeline_path: "pipeline.web.yml"
+    run_id_prefix: "mid_morning"
+  - publish_at: "2026-01-01T10:30"
+    pipeline_path: "pipeline.web.yml"
+"""
+
+# job_id ของ entry แรก (10:00 Asia/Bangkok = 03:00Z) ในเทส deterministic
+# ตรึงเป็นค่าคงที่ เพราะ job_id คือ idempotency key ของงานในคิว สูตรต้องไม่เปลี่ยนโดยไม่ตั้งใจ
+# = sha256("2026-01-01T03:00:00Z|pipeline.web.yml|20260101_1000")[:12]
+_EXPECTED_FIRST_JOB_ID = "fbfe59125428"
+
+
+@dataclass
+class SchedulerEnv:
+    """plan, คิว และเวลาปัจจุบันที่ใช้ร่วมกันในแต่ละเทส"""
+
+    plan_path: Path
+    queue: FileQueue
+    now_utc: datetime = _NOW_UTC
+
+    def make_plan(self, entries: str, *, header: str = _SCHEDULE_HEADER) -> Path:
+        self.plan_path.write_text(header + entries, encoding="utf-8")
+        return self.plan_path
+
+    def schedule(
+        self, *, dry_run: bool = True, created_at_utc: datetime | None = None
+    ) -> ScheduleResult:
+        return schedule_due_jobs(
+            plan_path=self.plan_path,
+            queue=self.queue,
+            now_utc=self.now_utc,
+            window_minutes=10,
+            dry_run=dry_run,
+            scheduler_enabled=True,
+            created_at_utc=created_at_utc or self.now_utc,
+        )
 
-    queue = FileQueue(tmp_path / "queue")
-    now_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
 
-    result = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=True,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
+@pytest.fixture
+def scheduler_env(tmp_path: Path) -> SchedulerEnv:
+    return SchedulerEnv(
+        plan_path=tmp_path / "schedule_plan.yaml",
+        queue=FileQueue(tmp_path / "queue"),
     )
 
-    assert len(result.enqueued_job_ids) == 2
-    assert any(skip.code == "entry_not_due" for skip in result.skipped_entries)
 
-    tz = ZoneInfo("Asia/Bangkok")
-    scheduled_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
-    run_id_base = scheduled_utc.astimezone(tz).strftime("%Y%m%d_%H%M")
-    seed = f"{_utc_iso(scheduled_utc)}|pipeline.web.yml|{run_id_base}"
-    expected_job_id = hashlib.sha256(seed.encode("utf-8")).hexdigest()[:12]
-
-    assert result.enqueued_job_ids[0] == expected_job_id
-
-    repeat = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=True,
-        scheduler_enabled=True,
-        created_at_utc=now_utc + timedelta(minutes=1),
+@pytest.fixture(scope="module")
+def shared_scheduler_env(tmp_path_factory) -> SchedulerEnv:
+    """
+    SchedulerEnv เดียวต่อโมดูล สำหรับเทสที่รันแบบ dry_run เท่านั้น (ไม่เขียนลงคิว)
+    แต่ละเทสเขียน plan ใหม่ทับไฟล์เดิมผ่าน make_plan
+    """
+    base_dir = tmp_path_factory.mktemp("sched")
+    return SchedulerEnv(
+        plan_path=base_dir / "schedule_plan.yaml",
+        queue=FileQueue(base_dir / "queue"),
     )
-    assert repeat.enqueued_job_ids == result.enqueued_job_ids
 
 
-def test_scheduler_invalid_timezone(tmp_path: Path):
-    """ทดสอบการจัดการ timezone ที่ไม่ถูกต้อง"""
-    plan_path = tmp_path / "schedule_plan.yaml"
-    plan_path.write_text(
-        "\n".join(
-            [
-                'schema_version: "v1"',
-                'timezone: "Invalid/Timezone"',
-                "entries:",
-                '  - publish_at: "2026-01-01T10:00"',
-                '    pipeline_path: "pipeline.web.yml"',
-            ]
-        ),
-        encoding="utf-8",
-    )
+def test_scheduler_due_selection_deterministic(shared_scheduler_env: SchedulerEnv):
+    shared_scheduler_env.make_plan(_DETERMINISTIC_ENTRIES)
 
-    queue = FileQueue(tmp_path / "queue")
-    now_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
-
-    with pytest.raises(SchedulePlanError):
-        schedule_due_jobs(
-            plan_path=plan_path,
-            queue=queue,
-            now_utc=now_utc,
-            window_minutes=10,
-            dry_run=True,
-            scheduler_enabled=True,
-            created_at_utc=now_utc,
-        )
+    result = shared_scheduler_env.schedule()
 
+    assert len(result.enqueued_job_ids) == 2
+    assert any(skip.code == "entry_not_due" for skip in result.skipped_entries)
 
-def test_scheduler_invalid_publish_at(tmp_path: Path):
-    """ทดสอบการจัดการรูปแบบ publish_at ที่ไม่ถูกต้อง"""
-    plan_path = tmp_path / "schedule_plan.yaml"
-    plan_path.write_text(
-        "\n".join(
-            [
-                'schema_version: "v1"',
-                'timezone: "Asia/Bangkok"',
-                "entries:",
-                '  - publish_at: "invalid-datetime"',
-                '    pipeline_path: "pipeline.web.yml"',
-            ]
-        ),
-        encoding="utf-8",
+    assert result.enqueued_job_ids[0] == _EXPECTED_FIRST_JOB_ID
+    assert (
+        build_job_id(_NOW_UTC, "pipeline.web.yml", "20260101_1000")
+        == _EXPECTED_FIRST_JOB_ID
     )
 
-    queue = FileQueue(tmp_path / "queue")
-    now_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
-
-    result = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=True,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
+    repeat = shared_scheduler_env.schedule(
+        created_at_utc=shared_scheduler_env.now_utc + timedelta(minutes=1)
     )
-
-    # ควรจะข้ามงานที่มี publish_at ไม่ถูกต้อง
-    assert len(result.enqueued_job_ids) == 0
-    assert len(result.skipped_entries) == 1
-    assert result.skipped_entries[0].code == "job_invalid"
+    assert repeat.enqueued_job_ids == result.enqueued_job_ids
 
 
-def test_scheduler_missing_required_fields(tmp_path: Path):
-    """ทดสอบการจัดการเมื่อขาดฟิลด์ที่จำเป็น"""
-    plan_path = tmp_path / "schedule_plan.yaml"
-    plan_path.write_text(
-        "\n".join(
-            [
-                'schema_version: "v1"',
-                'timezone: "Asia/Bangkok"',
-                "entries:",
-                '  - publish_at: "2026-01-01T10:00"',
-                # ขาด pipeline_path
-            ]
+@pytest.mark.parametrize(
+    ("entries", "header", "expected_exc", "expected_skip_code"),
+    [
+        pytest.param(
+            _SINGLE_ENTRY,
+            'schema_version: "v1"\ntimezone: "Invalid/Timezone"\nentries:\n',
+            SchedulePlanError,
+            None,
+            id="invalid_timezone",
         ),
-        encoding="utf-8",
-    )
+        pytest.param(
+            _ENTRY_TEMPLATE.format(
+                publish_at="invalid-datetime", pipeline_path="pipeline.web.yml"
+            ),
+            _SCHEDULE_HEADER,
+            None,
+            "job_invalid",
+            id="invalid_publish_at",
+        ),
+        pytest.param(
+            # ขาด pipeline_path
+            '  - publish_at: "2026-01-01T10:00"\n',
+            _SCHEDULE_HEADER,
+            None,
+            "job_invalid",
+            id="missing_required_fields",
+        ),
+        pytest.param(
+            "invalid: yaml: [content",
+            "",
+            SchedulePlanError,
+            None,
+            id="malformed_yaml",
+        ),
+    ],
+)
+def test_scheduler_invalid_plans(
+    shared_scheduler_env: SchedulerEnv,
+    entries: str,
+    header: str,
+    expected_exc: type[Exception] | None,
+    expected_skip_code: str | None,
+):
+    """
+    ทดสอบแผนที่ไม่ถูกต้อง: ระดับแผน (timezone/YAML) ต้อง raise
+    ส่วน entry ที่ไม่ถูกต้อง (publish_at/ขาดฟิลด์) ต้องถูกข้ามด้วย code ที่กำหนด
+    """
+    shared_scheduler_env.make_plan(entries, header=header)
 
-    queue = FileQueue(tmp_path / "queue")
-    now_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
-
-    result = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=True,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
-    )
+    if expected_exc is not None:
+        with pytest.raises(expected_exc):
+            shared_scheduler_env.schedule()
+        return
 
-    # ควรจะข้ามงานที่ขาดฟิลด์จำเป็น
+    result = shared_scheduler_env.schedule()
     assert len(result.enqueued_job_ids) == 0
     assert len(result.skipped_entries) == 1
-    assert result.skipped_entries[0].code == "job_invalid"
-
-
-def test_scheduler_malformed_yaml(tmp_path: Path):
-    """ทดสอบการจัดการ YAML ที่ไม่ถูกต้อง"""
-    plan_path = tmp_path / "schedule_plan.yaml"
-    plan_path.write_text("invalid: yaml: [content", encoding="utf-8")
-
-    queue = FileQueue(tmp_path / "queue")
-    now_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
-
-    with pytest.raises(SchedulePlanError):
-        schedule_due_jobs(
-            plan_path=plan_path,
-            queue=queue,
-            now_utc=now_utc,
-            window_minutes=10,
-            dry_run=True,
-            scheduler_enabled=True,
-            created_at_utc=now_utc,
-        )
+    assert result.skipped_entries[0].code == expected_skip_code
 
 
 @pytest.mark.parametrize(
     "pipeline_path",
-    [
-        "../pipeline.web.yml",
-        "/abs/pipeline.web.yml",
-    ],
+    ["../pipeline.web.yml", "/abs/pipeline.web.yml"],
+    ids=["traversal", "absolute"],
 )
-def test_scheduler_rejects_pipeline_path_traversal(tmp_path: Path, pipeline_path: str):
+def test_scheduler_rejects_pipeline_path_traversal(
+    shared_scheduler_env: SchedulerEnv, pipeline_path: str
+):
     """ทดสอบว่า ScheduleEntry ปฏิเสธ path traversal/absolute path"""
 
-    plan_path = tmp_path / "schedule_plan.yaml"
-    plan_path.write_text(
-        "\n".join(
-            [
-                'schema_version: "v1"',
-                'timezone: "Asia/Bangkok"',
-                "entries:",
-                '  - publish_at: "2026-01-01T10:00"',
-                f'    pipeline_path: "{pipeline_path}"',
-            ]
-        ),
-        encoding="utf-8",
+    shared_scheduler_env.make_plan(
+        _ENTRY_TEMPLATE.format(
+            publish_at="2026-01-01T10:00", pipeline_path=pipeline_path
+        )
     )
 
-    queue = FileQueue(tmp_path / "queue")
-    now_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
-
-    result = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=True,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
-    )
+    result = shared_scheduler_env.schedule()
 
     assert result.enqueued_job_ids == []
     assert len(result.skipped_entries) == 1
     assert result.skipped_entries[0].code == "job_invalid"
 
 
-def test_scheduler_dry_run_matches_actual_run(tmp_path: Path):
+def test_scheduler_dry_run_matches_actual_run(scheduler_env: SchedulerEnv):
     """
     ทดสอบว่า dry_run ให้ผลลัพธ์ที่ตรงกับ actual run
 
@@ -246,77 +201,30 @@ def test_scheduler_dry_run_matches_actual_run(tmp_path: Path):
     ตอนนี้ใช้ enqueue() แบบเดียวกันทั้งสองโหมด
     """
 
-    plan_path = tmp_path / "schedule_plan.yaml"
-    plan_path.write_text(
-        "\n".join(
-            [
-                'schema_version: "v1"',
-                'timezone: "Asia/Bangkok"',
-                "entries:",
-                '  - publish_at: "2026-01-01T10:00"',
-                '    pipeline_path: "pipeline.web.yml"',
-            ]
-        ),
-        encoding="utf-8",
-    )
-
-    queue = FileQueue(tmp_path / "queue")
-    now_utc = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
+    scheduler_env.make_plan(_SINGLE_ENTRY)
 
     # Run 1: dry_run ครั้งแรก ควรบอกว่าจะ enqueue
-    result1 = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=True,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
-    )
+    result1 = scheduler_env.schedule()
 
     assert len(result1.enqueued_job_ids) == 1
     assert len(result1.skipped_entries) == 0
     job_id = result1.enqueued_job_ids[0]
 
     # Run 2: actual run ควร enqueue งานจริง
-    result2 = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=False,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
-    )
+    result2 = scheduler_env.schedule(dry_run=False)
 
     assert result2.enqueued_job_ids == [job_id]
     assert len(result2.skipped_entries) == 0
 
     # Run 3: dry_run อีกครั้งหลังจาก enqueue แล้ว ควรบอกว่า skip
-    result3 = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=True,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
-    )
+    result3 = scheduler_env.schedule()
 
     assert len(result3.enqueued_job_ids) == 0
     assert len(result3.skipped_entries) == 1
     assert result3.skipped_entries[0].code == "already_enqueued"
 
     # Run 4: actual run อีกครั้ง ก็ควร skip เหมือนกัน
-    result4 = schedule_due_jobs(
-        plan_path=plan_path,
-        queue=queue,
-        now_utc=now_utc,
-        window_minutes=10,
-        dry_run=False,
-        scheduler_enabled=True,
-        created_at_utc=now_utc,
-    )
+    result4 = scheduler_env.schedule(dry_run=False)
 
     assert len(result4.enqueued_job_ids) == 0
     assert len(result4.skipped_entries) == 1
@@ -32,6 +32,7 @@ from automation_core.voiceover_tts import (
     generate_voiceover,
     normalize_script_text,
 )
+from tests.helpers import snapshot_paths
 
 
 def test_deterministic_output_path():
@@ -91,6 +92,12 @@ def test_trailing_whitespace_normalization_hash_stable():
     assert sha_a == sha_b
 
 
+def test_compute_input_sha256_rejects_non_string():
+    """ทดสอบว่า input ที่ไม่ใช่สตริงได้ TypeError ตามที่ระบุใน docstring"""
+    with pytest.raises(TypeError, match="script_text must be a string"):
+        compute_input_sha256(["Line one"])
+
+
 def test_normalize_script_text_mixed_line_endings_and_rstrip():
     """ทดสอบ normalize_script_text รองรับ mixed line endings และ rstrip แบบ deterministic"""
     raw = "a\r\nb \n\r c\t\r"
@@ -104,7 +111,7 @@ def test_kill_switch_no_side_effects(tmp_path, monkeypatch, capsys):
 
     script_path = tmp_path / "script.txt"
     script_path.write_text("Hello world", encoding="utf-8")
-    before = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*"))
+    before = snapshot_paths(tmp_path)
 
     exit_code = cli_main(
         [
@@ -121,7 +128,7 @@ def test_kill_switch_no_side_effects(tmp_path, monkeypatch, capsys):
     assert exit_code == 0
     assert PIPELINE_DISABLED_MESSAGE in captured.out
     assert not (tmp_path / "data" / "voiceovers").exists()
-    after = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*"))
+    after = snapshot_paths(tmp_path)
     assert before == after
 
 
@@ -143,7 +150,7 @@ def test_cli_dry_run_prints_paths_without_creating_files(tmp_path, monkeypatch,
     script_path = tmp_path / "script.txt"
     script_path.write_text(script_text, encoding="utf-8")
 
-    before = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*"))
+    before = snapshot_paths(tmp_path)
     exit_code = cli_main(
         [
             "--run-id",
@@ -168,7 +175,7 @@ def test_cli_dry_run_prints_paths_without_creating_files(tmp_path, monkeypatch,
     assert expected_json in captured.out
 
     assert not (tmp_path / "data" / "voiceovers").exists()
-    after = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*"))
+    after = snapshot_paths(tmp_path)
     assert before == after
 
 